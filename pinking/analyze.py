@@ -0,0 +1,151 @@
+import os
+
+import numpy as np
+
+from .capture import HEADER, TIMESTAMP, read_header, state_size
+
+
+# all functions work on whole windows of samples at once, pins are
+# zero-based indices into the packed state like everywhere else
+
+
+def load_capture(path):
+    """Memory-maps a capture file. Returns a ``(timestamps, states,
+    num_pins)`` tuple, ``states`` holding the packed state of each sample as
+    a row of little-endian bytes."""
+
+    with open(path, 'rb') as fp:
+        num_pins = read_header(fp)
+
+    size = state_size(num_pins)
+    dtype = np.dtype([('t', '<f8'), ('state', 'u1', (size, ))])
+    count = (os.path.getsize(path) - HEADER.size) // (TIMESTAMP.size + size)
+
+    if not count:
+        return np.zeros(0), np.zeros((0, size), np.uint8), num_pins
+
+    records = np.memmap(path, dtype=dtype, mode='r', offset=HEADER.size,
+                        shape=(count, ))
+    return records['t'], records['state'], num_pins
+
+
+def split_windows(t):
+    """Returns a slice for each window of consecutive samples, split at the
+    window markers (``nan`` timestamps). Captures without markers are a
+    single window."""
+
+    markers = np.flatnonzero(np.isnan(t))
+    bounds = np.concatenate(([-1], markers, [len(t)]))
+    return [slice(start + 1, stop)
+            for start, stop in zip(bounds[:-1], bounds[1:])
+            if stop - start > 1]
+
+
+def per_window(func, windows, t, *bits, **kwargs):
+    """Calls ``func(t, *bits, **kwargs)`` on every window and concatenates
+    each of the returned arrays."""
+
+    results = [func(t[w], *[b[w] for b in bits], **kwargs)
+               for w in windows]
+    if not results:
+        results = [func(t[:0], *[b[:0] for b in bits], **kwargs)]
+
+    return tuple(np.concatenate(arrays) for arrays in zip(*results))
+
+
+def changed_pins(states, windows, num_pins, chunk_size=1 << 16):
+    """Returns all pins that change level inside any of ``windows``.
+
+    The states are XORed with their successors and OR-reduced in chunks, so
+    this is a single pass over the capture, no matter how many pins there
+    are."""
+
+    mask = np.zeros(states.shape[1], np.uint8)
+
+    for w in windows:
+        for start in xrange(w.start, w.stop - 1, chunk_size):
+            chunk = states[start:min(start + chunk_size + 1, w.stop)]
+            mask |= np.bitwise_or.reduce(chunk[1:] ^ chunk[:-1], axis=0)
+
+    return [pin for pin in range(num_pins) if mask[pin // 8] >> (pin % 8) & 1]
+
+
+def pin_bits(states, pin):
+    """Returns the level of ``pin`` in every sample."""
+    return (states[:, pin // 8] >> (pin % 8)) & 1
+
+
+def edges(bits):
+    """Returns the indices of all samples where ``bits`` rises and falls."""
+    d = np.diff(bits.astype(np.int8))
+    idx = np.flatnonzero(d)
+    rising = d[idx] > 0
+    return idx[rising] + 1, idx[~rising] + 1
+
+
+def edge_times(t, bits):
+    """Returns the times of all rising and falling edges of ``bits``."""
+    rising, falling = edges(bits)
+    return t[rising], t[falling]
+
+
+def pulse_widths(t, bits):
+    """Returns the durations of all complete high and low pulses."""
+    rising, falling = edges(bits)
+
+    # merge edges back into order, remembering which ones were rising
+    idx = np.concatenate((rising, falling))
+    is_rising = np.concatenate((np.ones(len(rising), bool),
+                                np.zeros(len(falling), bool)))
+    order = np.argsort(idx, kind='mergesort')
+    times, starts_high = t[idx[order]], is_rising[order]
+
+    widths = np.diff(times)
+    return widths[starts_high[:-1]], widths[~starts_high[:-1]]
+
+
+def edge_skew(t_a, t_b):
+    """For each edge time in ``t_a``, returns the signed offset to the
+    nearest edge time in ``t_b``."""
+
+    if not len(t_a) or not len(t_b):
+        return np.zeros(0)
+
+    pos = np.searchsorted(t_b, t_a)
+    before = t_b[np.clip(pos - 1, 0, len(t_b) - 1)]
+    after = t_b[np.clip(pos, 0, len(t_b) - 1)]
+
+    d_before, d_after = before - t_a, after - t_a
+    return np.where(np.abs(d_before) <= np.abs(d_after), d_before, d_after)
+
+
+def clock_data_alignment(t, clock, data, falling=False):
+    """Samples ``data`` on every clock edge and measures setup and hold
+    time, i.e. the time since the previous and until the next data
+    transition.
+
+    Returns ``(bits, setup, hold)``. Setup and hold are ``nan`` where there
+    is no data transition before or after the edge.
+    """
+
+    rising, falling_ = edges(clock)
+    clk_idx = falling_ if falling else rising
+    bits = data[clk_idx]
+
+    d_rising, d_falling = edges(data)
+    d_times = t[np.sort(np.concatenate((d_rising, d_falling)))]
+    clk_times = t[clk_idx]
+
+    setup = np.full(len(clk_idx), np.nan)
+    hold = np.full(len(clk_idx), np.nan)
+
+    if len(d_times):
+        # data changing on the same sample as the clock counts as a
+        # transition after the edge
+        pos = np.searchsorted(d_times, clk_times)
+        has_prev, has_next = pos > 0, pos < len(d_times)
+
+        setup[has_prev] = clk_times[has_prev] - d_times[pos[has_prev] - 1]
+        hold[has_next] = d_times[pos[has_next]] - clk_times[has_next]
+
+    return bits, setup, hold
@@ -0,0 +1,92 @@
+import binascii
+import struct
+
+
+# capture files start with a small header, followed by fixed-size records of
+# a little-endian float64 timestamp and the packed pin state, stored as a
+# little-endian integer of ``(num_pins + 7) // 8`` bytes. Since version 2, a
+# record with a NaN timestamp marks the start of a new, separate window of
+# samples, e.g. around a trigger.
+MAGIC = b'PKCAP'
+VERSION = 2
+SUPPORTED_VERSIONS = (1, 2)
+HEADER = struct.Struct('<5sBH')
+TIMESTAMP = struct.Struct('<d')
+
+
+def state_size(num_pins):
+    return (num_pins + 7) // 8
+
+
+def state_to_bytes(state, size):
+    return binascii.unhexlify('%0*x' % (size * 2, state))[::-1]
+
+
+def state_from_bytes(data):
+    return int(binascii.hexlify(data[::-1]), 16)
+
+
+def pack_header(num_pins):
+    return HEADER.pack(MAGIC, VERSION, num_pins)
+
+
+def pack_record(timestamp, state, size):
+    return TIMESTAMP.pack(timestamp) + state_to_bytes(state, size)
+
+
+class CaptureWriter(object):
+    def __init__(self, fp, num_pins):
+        self.fp = fp
+        self.num_pins = num_pins
+        self.size = state_size(num_pins)
+        self.record_count = 0
+
+        fp.write(pack_header(num_pins))
+
+    def write(self, timestamp, state):
+        self.fp.write(pack_record(timestamp, state, self.size))
+        self.record_count += 1
+
+    def mark(self):
+        """Starts a new window, unconnected to the previous samples."""
+        self.fp.write(pack_record(float('nan'), 0, self.size))
+
+    def flush(self):
+        self.fp.flush()
+
+
+def read_header(fp):
+    """Reads and checks the capture header from ``fp``. Returns the number of
+    pins stored in each record."""
+
+    header = fp.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise ValueError('Not a pinking capture file')
+
+    magic, version, num_pins = HEADER.unpack(header)
+
+    if magic != MAGIC:
+        raise ValueError('Not a pinking capture file')
+    if version not in SUPPORTED_VERSIONS:
+        raise ValueError('Unsupported capture version {}'.format(version))
+
+    return num_pins
+
+
+def read_capture(fp):
+    """Yields ``(timestamp, state)`` tuples from a capture file, skipping
+    window markers."""
+
+    size = state_size(read_header(fp))
+    rec_size = TIMESTAMP.size + size
+
+    while True:
+        rec = fp.read(rec_size)
+        if len(rec) < rec_size:
+            break
+
+        timestamp = TIMESTAMP.unpack_from(rec)[0]
+        if timestamp != timestamp:
+            continue
+
+        yield timestamp, state_from_bytes(rec[TIMESTAMP.size:])
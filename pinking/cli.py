@@ -1,18 +1,27 @@
-from contextlib2 import ExitStack
 import sys
 import time
 
 import click
 import logbook
 
+from .capture import CaptureWriter
+from .dispatch import Dispatcher
 from .exc import LayoutNotFoundError
+from .expander import parse_expanders
+from .generator import Generator, parse_waveform
 from .model import PinKingModel
+from .output import FORMATS, BufferedRecordWriter
+from .trigger import TriggerCapture, check_trigger_pins, parse_trigger
+from .vectors import VectorError, VectorFile, VectorRunner
 from .ui import PinKingUI
 from .util import curses_wrap, clock
 
 
 HOME_URL = 'https://github.com/mbr/pinking'
 
+# subcommands that do not access any GPIO pins
+OFFLINE_COMMANDS = ('analyze', )
+
 if sys.version_info.major == 2:
     PKG_NAMES = {
         'RPi.GPIO': 'python-rpi.gpio',
@@ -45,11 +54,10 @@ def load_gpio(fake_gpio):
     return GPIO
 
 
-def run_gpio_test(model, show_out):
+def run_gpio_test(model, show_out, poll_freq):
     logbook.NullHandler(level=logbook.DEBUG).push_application()
     logbook.StderrHandler(level=logbook.INFO).push_application()
 
-    poll_freq = 10.0
     click.echo('{} Hz'.format(poll_freq))
 
     def _on_iv_change(model, values):
@@ -65,10 +73,12 @@ def run_gpio_test(model, show_out):
             'IN' if direction == model.gpio.IN else 'OUT',
         ))
 
-    model.in_values_changed.connect(_on_iv_change)
+    # echoing happens in dispatcher threads, the poll loop only enqueues
+    dispatcher = Dispatcher()
+    dispatcher.subscribe(model.in_values_changed, _on_iv_change)
     if show_out:
-        model.out_values_changed.connect(_on_ov_change)
-    model.direction_changed.connect(_on_d_change)
+        dispatcher.subscribe(model.out_values_changed, _on_ov_change)
+    dispatcher.subscribe(model.direction_changed, _on_d_change, maxlen=1024)
 
     # last 2 gpio pins are set to output
     out_pins = [p for p, n in enumerate(model.layout)
@@ -79,26 +89,121 @@ def run_gpio_test(model, show_out):
         model.set_output_value(pin, model.gpio.LOW)
 
     cycles = 0
-    for missed_ticks in clock(1.0/poll_freq):
-        cycles += 1 + missed_ticks
+    try:
+        for missed_ticks in clock(1.0/poll_freq):
+            cycles += 1 + missed_ticks
+
+            if cycles > poll_freq:
+                cycles = 0
+
+                # every second ms, change an output pins
+                out_pins[0], out_pins[1] = out_pins[1], out_pins[0]
+
+                for n, pin in enumerate(out_pins):
+                    hl = model.gpio.HIGH if n % 2 else model.gpio.LOW
+                    model.set_direction(pin, model.gpio.OUT)
+                    model.set_output_value(pin, hl)
+
+            model.read_input_values()
+            if missed_ticks:
+                click.echo('Missed clock ticks: {}'.format(missed_ticks))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        dispatcher.close()
+
+    for stats in dispatcher.stats():
+        click.echo('{name} ({policy}): {delivered}/{enqueued} delivered, '
+                   '{dropped} dropped, enqueue {mean_enqueue_us:.1f} us, '
+                   'receiver {mean_receiver_us:.1f} us'.format(**stats))
+
+
+def run_trigger_capture(model, capture, poll_freq):
+    logbook.NullHandler(level=logbook.DEBUG).push_application()
+    logbook.StderrHandler(level=logbook.INFO).push_application()
+
+    click.echo('{} Hz, waiting for triggers. Press Ctrl-C to stop.'
+               .format(poll_freq))
 
-        if cycles > poll_freq:
-            cycles = 0
+    read_input_values = model.read_input_values
+    sample = capture.sample
 
-            # every second ms, change an output pins
-            out_pins[0], out_pins[1] = out_pins[1], out_pins[0]
+    try:
+        for missed_ticks in clock(1.0/poll_freq):
+            read_input_values()
+            sample(time.time(), model.in_state)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        capture.writer.flush()
+
+    click.echo('{} triggers, {} samples written.'.format(
+        capture.trigger_count, capture.writer.record_count))
+
+
+def run_generator(model, generator, duration):
+    logbook.NullHandler(level=logbook.DEBUG).push_application()
+    logbook.StderrHandler(level=logbook.INFO).push_application()
 
-            for n, pin in enumerate(out_pins):
-                hl = model.gpio.HIGH if n % 2 else model.gpio.LOW
-                model.set_direction(pin, model.gpio.OUT)
-                model.set_output_value(pin, hl)
+    click.echo('Driving {} pins. Press Ctrl-C to stop.'
+               .format(len(generator.pins)))
 
-        model.read_input_values()
-        if missed_ticks:
-            click.echo('Missed clock ticks: {}'.format(missed_ticks))
+    try:
+        generator.run(duration)
+    except KeyboardInterrupt:
+        pass
+
+
+def run_headless(model, writer, poll_freq):
+    logbook.NullHandler(level=logbook.DEBUG).push_application()
+    logbook.StderrHandler(level=logbook.INFO).push_application()
 
+    read_input_values = model.read_input_values
+    write = writer.write
+    prev = None
+    missed = 0
 
-@click.command()
+    try:
+        for missed_ticks in clock(1.0/poll_freq):
+            if writer.error is not None:
+                break
+
+            missed += missed_ticks
+            read_input_values()
+
+            state = model.in_state
+            if state != prev:
+                write(time.time(), state)
+                prev = state
+    except KeyboardInterrupt:
+        pass
+    finally:
+        writer.close()
+
+    click.echo('{} records written, {} missed clock ticks.'.format(
+        writer.record_count, missed), err=True)
+
+    if writer.error is not None:
+        click.echo('Writing output failed: {}'.format(writer.error),
+                   err=True)
+
+        # whatever is still buffered cannot be written either
+        try:
+            writer.fp.close()
+        except (IOError, OSError, ValueError):
+            pass
+
+        sys.exit(1)
+
+
+def _parse_triggers(ctx, param, value):
+    try:
+        return [parse_trigger(spec) for spec in value]
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+
+@click.group(invoke_without_command=True)
 @click.option('--fake-gpio', '-G', is_flag=True,
               help='Do not use GPIO library, fake input instead.')
 @click.option('--rev', '-r',
@@ -107,30 +212,300 @@ def run_gpio_test(model, show_out):
               help='Run model test.')
 @click.option('--test-show-out', is_flag=True,
               help='Show every output change when running output test.')
-def main(fake_gpio, rev, test, test_show_out):
+@click.option('--poll-freq', '-f', default=10.0,
+              help='Input polling frequency in Hz.')
+@click.option('--trigger', '-T', multiple=True, callback=_parse_triggers,
+              help='Capture trigger, e.g. "rising:12", "falling:12", '
+                   '"edge:12,16" or "12=1,16=0". Can be given multiple '
+                   'times.')
+@click.option('--capture', '-c', type=click.File('wb'),
+              help='Write samples around each trigger to this file.')
+@click.option('--pre-trigger', default=1000,
+              help='Number of samples to keep before a trigger.')
+@click.option('--post-trigger', default=1000,
+              help='Number of samples to record after a trigger.')
+@click.option('--generate', '-g', multiple=True,
+              help='Output waveform, e.g. "pwm:12:1000:0.25", "square:12:50" '
+                   'or "pattern:12:1011001:100". Can be given multiple '
+                   'times.')
+@click.option('--duration', type=float,
+              help='Stop generating waveforms after this many seconds.')
+@click.option('--format', '-F', 'fmt', type=click.Choice(sorted(FORMATS)),
+              help='Run headless, writing timestamped input changes in this '
+                   'format.')
+@click.option('--output', '-o', type=click.File('wb'), default='-',
+              help='Output file for --format, defaults to stdout.')
+@click.option('--flush-interval', default=0.1,
+              help='Seconds between flushes of --format output.')
+@click.option('--expander', '-x', multiple=True,
+              help='I2C I/O expander as type:bus:address, e.g. '
+                   '"mcp23017:1:0x20" or "pcf8574:1:0x38". Can be given '
+                   'multiple times.')
+@click.pass_context
+def main(ctx, fake_gpio, rev, test, test_show_out, poll_freq, trigger, capture,
+         pre_trigger, post_trigger, generate, duration, fmt, output,
+         flush_interval, expander):
+    if ctx.invoked_subcommand in OFFLINE_COMMANDS:
+        # no hardware needed
+        return
+
+    modes = [opt for opt, value in (('--test', test),
+                                    ('--format', fmt is not None),
+                                    ('--trigger', trigger),
+                                    ('--generate', generate)) if value]
+    if len(modes) > 1:
+        raise click.UsageError('{} cannot be combined.'.format(
+            ' and '.join(modes)))
+    if capture is not None and not trigger:
+        raise click.UsageError('--capture requires --trigger.')
+    if trigger and capture is None:
+        raise click.UsageError('--trigger requires --capture.')
+
     gpio = load_gpio(fake_gpio)
 
     if rev is None:
         rev = gpio.RPI_INFO['REVISION']
 
-    click.echo('Using GPIO: {}'.format(gpio))
-    click.echo('Model [{}]: {[TYPE]}'.format(rev, gpio.RPI_INFO))
+    # keep stdout clean for machine-readable output
+    err = fmt is not None
+
+    click.echo('Using GPIO: {}'.format(gpio), err=err)
+    click.echo('Model [{}]: {[TYPE]}'.format(rev, gpio.RPI_INFO), err=err)
+
+    try:
+        expanders = parse_expanders(expander, simulate=fake_gpio)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint='--expander')
+    except RuntimeError as e:
+        click.echo(str(e), err=err)
+        sys.exit(1)
 
     try:
         # instantiate model
-        model = PinKingModel(gpio, rev)
+        model = PinKingModel(gpio, rev, expanders)
     except LayoutNotFoundError as e:
         click.echo('No pin layout known for {}.\n'
-                   'Please report this issue to {}'.format(e, HOME_URL))
+                   'Please report this issue to {}'.format(e, HOME_URL),
+                   err=err)
         sys.exit(1)
 
+    # once we're done, reset GPIO pins and stop expander polling
+    ctx.call_on_close(model.cleanup)
+
+    if ctx.invoked_subcommand is not None:
+        ctx.obj = model
+        return
+
     if test:
         click.echo('GPIO test mode.')
-        run_gpio_test(model, test_show_out)
+        run_gpio_test(model, test_show_out, poll_freq)
+        sys.exit(0)
+
+    if fmt is not None:
+        writer = BufferedRecordWriter(output, FORMATS[fmt](model.layout),
+                                      flush_interval)
+        run_headless(model, writer, poll_freq)
         sys.exit(0)
 
-    with curses_wrap() as stdscr, ExitStack() as cleanup:
-        cleanup.callback(gpio.cleanup)  # once we're done, reset GPIO pins
+    if trigger:
+        try:
+            check_trigger_pins(trigger, model)
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint='--trigger')
+
+        click.echo('Trigger capture mode.')
+        writer = CaptureWriter(capture, len(model.layout))
+        run_trigger_capture(model,
+                            TriggerCapture(trigger, writer,
+                                           pre_trigger, post_trigger),
+                            poll_freq)
+        sys.exit(0)
+
+    if generate:
+        click.echo('Waveform generator mode.')
+        generator = Generator(model)
+
+        try:
+            for spec in generate:
+                generator.add(*parse_waveform(spec, generator))
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint='--generate')
 
-        ui = PinKingUI(stdscr, model)
+        run_generator(model, generator, duration)
+        sys.exit(0)
+
+    with curses_wrap() as stdscr:
+        ui = PinKingUI(stdscr, model, poll_freq)
         ui.run()
+
+
+@main.command()
+@click.argument('vectors', type=click.File('r'))
+@click.option('--settle', type=float, default=0.0001,
+              help='Seconds to wait before sampling inputs, unless given in '
+                   'the vector file.')
+@click.option('--max-failures', default=20,
+              help='Maximum number of failed vectors to list.')
+@click.pass_obj
+def run(model, vectors, settle, max_failures):
+    """Run a test vector file."""
+    try:
+        vector_file = VectorFile.parse(vectors)
+    except VectorError as e:
+        click.echo('{}: {}'.format(vectors.name, e))
+        sys.exit(1)
+
+    runner = VectorRunner(model, vector_file, settle)
+
+    try:
+        runner.run()
+    except ValueError as e:
+        click.echo(str(e))
+        sys.exit(1)
+
+    # collect summary, so we do not slow down the runner by echoing
+    inputs = vector_file.inputs
+    lines = []
+    for failure in runner.failures[:max_failures]:
+        pins = ', '.join(
+            '#{} expected {} got {}'.format(
+                inputs[n] + 1,
+                (failure.expected >> n) & 1,
+                (failure.actual >> n) & 1)
+            for n in range(len(inputs))
+            if failure.mismatch & (1 << n))
+        lines.append('FAIL line {}: {}'.format(failure.lineno, pins))
+
+    if len(runner.failures) > max_failures:
+        lines.append('... and {} more failures'.format(
+            len(runner.failures) - max_failures))
+
+    lines.append('{} vectors, {} passed, {} failed in {:.3f} s: {}'.format(
+        len(vector_file.vectors), runner.passed, len(runner.failures),
+        runner.elapsed, 'FAIL' if runner.failures else 'PASS'))
+
+    click.echo('\n'.join(lines))
+    sys.exit(1 if runner.failures else 0)
+
+
+def _fmt_time(seconds):
+    if abs(seconds) < 1e-3:
+        return '{:.1f} us'.format(seconds * 1e6)
+    if abs(seconds) < 1:
+        return '{:.3f} ms'.format(seconds * 1e3)
+    return '{:.3f} s'.format(seconds)
+
+
+def _fmt_stats(values):
+    import numpy as np
+
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return 'n=0'
+
+    return 'n={} min {} median {} max {}'.format(
+        len(values), _fmt_time(values.min()), _fmt_time(np.median(values)),
+        _fmt_time(values.max()))
+
+
+@main.command()
+@click.argument('capture', type=click.Path(exists=True, dir_okay=False))
+@click.option('--pin', '-p', type=int, multiple=True,
+              help='Pin to analyze, by board number. Defaults to all pins '
+                   'that change. Can be given multiple times.')
+@click.option('--bins', default=10,
+              help='Number of pulse width histogram bins.')
+@click.option('--clock', type=int,
+              help='Clock pin for clock/data alignment.')
+@click.option('--data', type=int,
+              help='Data pin for clock/data alignment.')
+@click.option('--falling-edge', is_flag=True,
+              help='Sample data on the falling instead of the rising clock '
+                   'edge.')
+def analyze(capture, pin, bins, clock, data, falling_edge):
+    """Analyze a recorded capture file."""
+    try:
+        import numpy as np
+        from . import analyze as an
+    except ImportError:
+        click.echo('NumPy is required for analyzing captures. Please '
+                   'install by running\n\n    $ ' +
+                   click.style('pip install numpy', bold=True) + '\n')
+        sys.exit(1)
+
+    try:
+        t, states, num_pins = an.load_capture(capture)
+    except ValueError as e:
+        click.echo('{}: {}'.format(capture, e))
+        sys.exit(1)
+
+    for hint, nums in (('--pin', pin), ('--clock', [clock]),
+                       ('--data', [data])):
+        for num in nums:
+            if num is not None and not 0 < num <= num_pins:
+                raise click.BadParameter(
+                    'Pin {} is out of range, the capture has pins 1 to {}.'
+                    .format(num, num_pins), param_hint=hint)
+
+    if (clock is None) != (data is None):
+        raise click.UsageError('--clock and --data must be given together.')
+
+    windows = an.split_windows(t)
+
+    lines = ['{} samples in {} windows, {} pins, {}'.format(
+        sum(w.stop - w.start for w in windows), len(windows), num_pins,
+        _fmt_time(t[windows[-1]][-1] - t[windows[0]][0]) if windows
+        else 'empty')]
+
+    if pin:
+        pins = [p - 1 for p in pin]
+    else:
+        pins = an.changed_pins(states, windows, num_pins)
+
+    # edges are only ever compared within the same window
+    edge_times = {}
+    for p in pins:
+        bits = an.pin_bits(states, p)
+        times = [an.edge_times(t[w], bits[w]) for w in windows]
+        edge_times[p] = [np.sort(np.concatenate(ts)) for ts in times]
+
+        lines.append('#{}: {} rising, {} falling edges'.format(
+            p + 1, sum(len(rising) for rising, _ in times),
+            sum(len(falling) for _, falling in times)))
+
+        for level, widths in zip(('high', 'low'),
+                                 an.per_window(an.pulse_widths, windows,
+                                               t, bits)):
+            lines.append('  {} pulses: {}'.format(level, _fmt_stats(widths)))
+            if not len(widths):
+                continue
+
+            counts, limits = np.histogram(widths, bins)
+            scale = 40.0 / counts.max()
+            for count, lower, upper in zip(counts, limits, limits[1:]):
+                lines.append('    {:>12} - {:>12} {:8} {}'.format(
+                    _fmt_time(lower), _fmt_time(upper), count,
+                    '#' * int(round(count * scale))))
+
+    # skew of every pin's edges relative to the first pin
+    for p in pins[1:]:
+        skew = np.concatenate([np.zeros(0)] + [
+            an.edge_skew(a, b)
+            for a, b in zip(edge_times[p], edge_times[pins[0]])])
+        lines.append('Skew #{} to #{}: {}'.format(p + 1, pins[0] + 1,
+                                                   _fmt_stats(skew)))
+
+    if clock is not None:
+        bits, setup, hold = an.per_window(
+            an.clock_data_alignment, windows, t,
+            an.pin_bits(states, clock - 1), an.pin_bits(states, data - 1),
+            falling=falling_edge)
+
+        lines.append('Clock #{} / data #{}: {} bits'.format(clock, data,
+                                                            len(bits)))
+        lines.append('  setup: {}'.format(_fmt_stats(setup)))
+        lines.append('  hold: {}'.format(_fmt_stats(hold)))
+        lines.append('  first bits: {}'.format(
+            ''.join(map(str, bits[:64]))))
+
+    click.echo('\n'.join(lines))
@@ -0,0 +1,136 @@
+from collections import deque
+import threading
+import time
+
+from logbook import Logger
+
+
+log = Logger('dispatch')
+
+
+# queue policies
+LATEST = 'latest'
+DROP_OLDEST = 'drop-oldest'
+
+
+class Subscription(object):
+    """Connects ``receiver`` to a blinker ``signal`` through a bounded queue
+    drained by a worker thread. Sending the signal only enqueues, so a slow
+    receiver never holds up the sender.
+
+    With the ``latest`` policy, only the most recent pending signal is kept
+    and earlier ones are coalesced. With ``drop-oldest``, up to ``maxlen``
+    signals are queued and the oldest is dropped once the queue is full.
+    """
+
+    def __init__(self, signal, receiver, policy=DROP_OLDEST, maxlen=64,
+                 name=None):
+        if policy not in (LATEST, DROP_OLDEST):
+            raise ValueError('Unknown policy: {}'.format(policy))
+
+        self.signal = signal
+        self.receiver = receiver
+        self.policy = policy
+        self.maxlen = 1 if policy == LATEST else maxlen
+        self.name = name or getattr(receiver, '__name__', repr(receiver))
+
+        self.queue = deque()
+        self.cond = threading.Condition()
+        self.closed = False
+
+        # statistics, times in seconds
+        self.enqueued = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.enqueue_time = 0.0
+        self.receiver_time = 0.0
+
+        signal.connect(self._enqueue, weak=False)
+
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _enqueue(self, sender, **kwargs):
+        start = time.time()
+
+        # values lists may be modified in place by the sender after the
+        # signal returns, so queue a snapshot
+        for key, value in kwargs.items():
+            if isinstance(value, list):
+                kwargs[key] = list(value)
+
+        with self.cond:
+            if len(self.queue) >= self.maxlen:
+                self.queue.popleft()
+                self.dropped += 1
+
+            self.queue.append((sender, kwargs))
+            self.enqueued += 1
+            self.cond.notify()
+
+        self.enqueue_time += time.time() - start
+
+    def _run(self):
+        queue, cond = self.queue, self.cond
+
+        while True:
+            with cond:
+                while not queue and not self.closed:
+                    cond.wait()
+
+                if not queue:
+                    return
+
+                sender, kwargs = queue.popleft()
+
+            start = time.time()
+            try:
+                self.receiver(sender, **kwargs)
+            except Exception:
+                log.exception('Error in subscriber {}'.format(self.name))
+            self.receiver_time += time.time() - start
+            self.delivered += 1
+
+    def close(self):
+        """Disconnects from the signal and waits until all queued signals are
+        delivered."""
+        self.signal.disconnect(self._enqueue)
+
+        with self.cond:
+            self.closed = True
+            self.cond.notify()
+
+        self._thread.join()
+
+    def stats(self):
+        return {
+            'name': self.name,
+            'policy': self.policy,
+            'enqueued': self.enqueued,
+            'delivered': self.delivered,
+            'dropped': self.dropped,
+            'pending': len(self.queue),
+            'mean_enqueue_us': (self.enqueue_time / self.enqueued * 1e6
+                                if self.enqueued else 0.0),
+            'mean_receiver_us': (self.receiver_time / self.delivered * 1e6
+                                 if self.delivered else 0.0),
+        }
+
+
+class Dispatcher(object):
+    def __init__(self):
+        self.subscriptions = []
+
+    def subscribe(self, signal, receiver, policy=DROP_OLDEST, maxlen=64,
+                  name=None):
+        sub = Subscription(signal, receiver, policy, maxlen, name)
+        self.subscriptions.append(sub)
+        return sub
+
+    def stats(self):
+        return [sub.stats() for sub in self.subscriptions]
+
+    def close(self):
+        for sub in self.subscriptions:
+            sub.close()
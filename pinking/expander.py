@@ -0,0 +1,300 @@
+from collections import OrderedDict
+from multiprocessing.pool import ThreadPool
+
+
+class Expander(object):
+    """Base class for I2C I/O expanders. Each expander is a bank of ``width``
+    pins that is read and written in a single bus transaction.
+
+    :param bus: An ``smbus.SMBus`` compatible bus.
+    :param address: I2C address of the expander.
+    :param name: Prefix for pin names, defaults to ``'E'`` followed by the
+                 bus number and the address in hex, e.g. ``E1-20``.
+    :param bus_num: Number of the bus, used for the default name.
+    """
+
+    width = 8
+    PIN_NAMES = ()
+
+    def __init__(self, bus, address, name=None, bus_num=None):
+        self.bus = bus
+        self.address = address
+        self.bus_num = bus_num
+
+        if name is None:
+            name = ('E{:02X}'.format(address) if bus_num is None
+                    else 'E{}-{:02X}'.format(bus_num, address))
+        self.name = name
+
+        # all pins start out as inputs
+        self.input_mask = (1 << self.width) - 1
+        self.out_state = 0
+
+    @property
+    def pin_names(self):
+        return ['{}.{}'.format(self.name, n) for n in self.PIN_NAMES]
+
+    def setup(self, bit, is_input):
+        if is_input:
+            self.input_mask |= 1 << bit
+        else:
+            self.input_mask &= ~(1 << bit)
+        self.configure()
+
+    def configure(self):
+        raise NotImplementedError
+
+    def read(self):
+        """Returns the packed state of all input pins."""
+        raise NotImplementedError
+
+    def write(self):
+        """Writes ``out_state`` to all output pins."""
+        raise NotImplementedError
+
+
+class MCP23017(Expander):
+    width = 16
+    PIN_NAMES = ['A{}'.format(n) for n in range(8)] + \
+                ['B{}'.format(n) for n in range(8)]
+
+    # register addresses with IOCON.BANK = 0 (power-on default), A and B
+    # registers are adjacent and can be accessed in one sequential transfer
+    IODIRA = 0x00
+    GPIOA = 0x12
+    OLATA = 0x14
+
+    def configure(self):
+        mask = self.input_mask
+        self.bus.write_i2c_block_data(self.address, self.IODIRA,
+                                      [mask & 0xff, mask >> 8])
+
+    def read(self):
+        a, b = self.bus.read_i2c_block_data(self.address, self.GPIOA, 2)
+        return (a | b << 8) & self.input_mask
+
+    def write(self):
+        state = self.out_state
+        self.bus.write_i2c_block_data(self.address, self.OLATA,
+                                      [state & 0xff, state >> 8 & 0xff])
+
+
+class PCF8574(Expander):
+    PIN_NAMES = ['P{}'.format(n) for n in range(8)]
+
+    # the PCF8574 has no direction register; its quasi-bidirectional pins
+    # act as inputs while they are written high
+
+    def configure(self):
+        self.write()
+
+    def read(self):
+        return self.bus.read_byte(self.address) & self.input_mask
+
+    def write(self):
+        self.bus.write_byte(self.address,
+                            (self.out_state | self.input_mask) & 0xff)
+
+
+EXPANDERS = {
+    'mcp23017': MCP23017,
+    'pcf8574': PCF8574,
+}
+
+
+class ExpanderBanks(object):
+    """Presents a number of expanders as additional pins, numbered
+    consecutively starting at ``offset``.
+
+    Expanders on different buses are polled in parallel; transactions on the
+    same bus are always serialized.
+    """
+
+    def __init__(self, expanders, offset):
+        self.expanders = list(expanders)
+        self.offset = offset
+        self.layout = []
+        self.pins = []
+
+        groups = OrderedDict()
+        for exp in self.expanders:
+            start = offset + len(self.pins)
+            groups.setdefault(id(exp.bus), []).append((exp, start))
+
+            self.layout.extend(exp.pin_names)
+            self.pins.extend((exp, bit) for bit in range(exp.width))
+
+        self.groups = list(groups.values())
+        self.pool = ThreadPool(len(self.groups)) if len(self.groups) > 1 \
+            else None
+
+    def __len__(self):
+        return len(self.pins)
+
+    def setup(self, pin, is_input):
+        exp, bit = self.pins[pin - self.offset]
+        exp.setup(bit, is_input)
+
+    def output(self, pins, values):
+        touched = OrderedDict()
+
+        for pin, value in zip(pins, values):
+            exp, bit = self.pins[pin - self.offset]
+            if value:
+                exp.out_state |= 1 << bit
+            else:
+                exp.out_state &= ~(1 << bit)
+            touched[id(exp)] = exp
+
+        # one write per expander, no matter how many of its pins changed
+        for exp in touched.values():
+            exp.write()
+
+    def read(self):
+        """Reads all banks. Returns the packed input state, with bit ``n``
+        set if pin ``n + 1`` is high."""
+
+        if self.pool is not None:
+            return sum(self.pool.map(_read_group, self.groups))
+
+        state = 0
+        for group in self.groups:
+            state |= _read_group(group)
+        return state
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+
+def _read_group(group):
+    state = 0
+    for exp, start in group:
+        state |= exp.read() << start
+    return state
+
+
+class SimulatedMCP23017(object):
+    def __init__(self):
+        self.registers = bytearray(0x16)
+        self.registers[0x00] = self.registers[0x01] = 0xff
+        self.inputs = 0
+
+    def read_block(self, reg, length):
+        if reg in (0x12, 0x13):
+            # GPIO registers reflect inputs and output latches
+            iodir = self.registers[0x00] | self.registers[0x01] << 8
+            olat = self.registers[0x14] | self.registers[0x15] << 8
+            port = (self.inputs & iodir) | (olat & ~iodir)
+            self.registers[0x12] = port & 0xff
+            self.registers[0x13] = port >> 8 & 0xff
+        return list(self.registers[reg:reg + length])
+
+    def write_block(self, reg, values):
+        self.registers[reg:reg + len(values)] = bytearray(values)
+
+
+class SimulatedPCF8574(object):
+    def __init__(self):
+        self.latch = 0xff
+        self.inputs = 0
+
+    def read(self):
+        # a pin written low is pulled low, otherwise it follows its input
+        return self.inputs & self.latch
+
+    def write(self, value):
+        self.latch = value
+
+
+class SimulatedBus(object):
+    """Stands in for an ``smbus.SMBus``, forwarding transactions to
+    simulated devices."""
+
+    def __init__(self):
+        self.devices = {}
+        self.transactions = 0
+
+    def attach(self, address, device):
+        self.devices[address] = device
+        return device
+
+    def read_i2c_block_data(self, addr, cmd, length=32):
+        self.transactions += 1
+        return self.devices[addr].read_block(cmd, length)
+
+    def write_i2c_block_data(self, addr, cmd, vals):
+        self.transactions += 1
+        self.devices[addr].write_block(cmd, vals)
+
+    def read_byte(self, addr):
+        self.transactions += 1
+        return self.devices[addr].read()
+
+    def write_byte(self, addr, val):
+        self.transactions += 1
+        self.devices[addr].write(val)
+
+
+SIMULATED_DEVICES = {
+    MCP23017: SimulatedMCP23017,
+    PCF8574: SimulatedPCF8574,
+}
+
+
+def open_bus(num):
+    try:
+        from smbus import SMBus
+    except ImportError:
+        raise RuntimeError('The smbus module is required to access I2C '
+                           'expanders.')
+
+    try:
+        return SMBus(num)
+    except IOError as e:
+        raise RuntimeError('Could not open I2C bus {}: {}'.format(num, e))
+
+
+def parse_expander(spec, buses, simulate=False, expanders=()):
+    """Parses an expander specification like ``mcp23017:1:0x20`` (type, bus
+    number, address) and returns an :class:`Expander`. Buses are opened on
+    demand and shared through the ``buses`` dict. If ``simulate`` is set, a
+    :class:`SimulatedBus` with a simulated device is used instead.
+
+    Raises :class:`ValueError` if one of ``expanders`` already uses the same
+    bus and address."""
+
+    try:
+        kind, num, address = spec.split(':')
+        cls = EXPANDERS[kind.lower()]
+        num, address = int(num), int(address, 0)
+    except (KeyError, ValueError):
+        raise ValueError('Invalid expander: {}'.format(spec))
+
+    for exp in expanders:
+        if exp.bus_num == num and exp.address == address:
+            raise ValueError('Duplicate expander on bus {} at {:#04x}'
+                             .format(num, address))
+
+    if num not in buses:
+        buses[num] = SimulatedBus() if simulate else open_bus(num)
+
+    bus = buses[num]
+    if simulate:
+        bus.attach(address, SIMULATED_DEVICES[cls]())
+
+    return cls(bus, address, bus_num=num)
+
+
+def parse_expanders(specs, simulate=False):
+    """Parses a list of expander specifications, see
+    :func:`parse_expander`."""
+    buses = {}
+    expanders = []
+
+    for spec in specs:
+        expanders.append(parse_expander(spec, buses, simulate, expanders))
+
+    return expanders
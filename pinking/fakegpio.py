@@ -27,6 +27,8 @@ class FakeGPIO(object):
 
     def __init__(self):
         self.in_values = [0] * 40
+        self.out_values = [0] * 40
+        self.output_calls = 0
 
         bg_thread = threading.Thread(target=self.rand_pins)
         bg_thread.daemon = True
@@ -46,6 +48,18 @@ class FakeGPIO(object):
     def input(self, channel):
         return self.in_values[channel - 1]
 
+    def output(self, channel, value):
+        # like RPi.GPIO, accept either single channels or lists of them
+        self.output_calls += 1
+
+        if not isinstance(channel, (list, tuple)):
+            channel, value = [channel], [value]
+        elif not isinstance(value, (list, tuple)):
+            value = [value] * len(channel)
+
+        for ch, v in zip(channel, value):
+            self.out_values[ch - 1] = v
+
     def __getattr__(self, name):
         def f(*args, **kwargs):
             parts = [str(a) for a in args]
@@ -0,0 +1,194 @@
+from heapq import heappop, heappush
+import time
+
+from logbook import Logger
+
+
+log = Logger('generator')
+
+
+# waveforms are iterables of ``(value, ticks)`` pairs: set the pin to
+# ``value``, then hold it for ``ticks`` scheduler ticks
+
+
+class PWM(object):
+    def __init__(self, period, duty):
+        if period < 1:
+            raise ValueError('PWM period must be at least one tick')
+        if not 0 <= duty <= 1:
+            raise ValueError('PWM duty cycle must be between 0 and 1')
+
+        self.period = period
+        self.high = int(round(period * duty))
+
+    def __iter__(self):
+        high, low = self.high, self.period - self.high
+
+        if not low:
+            yield (1, self.period)
+            return
+        if not high:
+            yield (0, self.period)
+            return
+
+        while True:
+            yield (1, high)
+            yield (0, low)
+
+
+class SquareWave(PWM):
+    def __init__(self, period):
+        super(SquareWave, self).__init__(period, 0.5)
+
+
+class BitPattern(object):
+    def __init__(self, bits, bit_ticks, repeat=True):
+        if bit_ticks < 1:
+            raise ValueError('Bit length must be at least one tick')
+
+        self.bits = [int(b) for b in bits]
+        self.bit_ticks = bit_ticks
+        self.repeat = repeat
+
+    def __iter__(self):
+        while True:
+            for bit in self.bits:
+                yield (bit, self.bit_ticks)
+
+            if not self.repeat:
+                return
+
+
+class Generator(object):
+    """Drives any number of output pins from a single heap of scheduled
+    transitions. All pins changing on the same tick are set using one bulk
+    write.
+
+    :param model: The :class:`~pinking.model.PinKingModel` to drive.
+    :param resolution: Length of a tick in seconds.
+    """
+
+    def __init__(self, model, resolution=0.0001, timer=time.time,
+                 sleep=time.sleep):
+        self.model = model
+        self.resolution = resolution
+        self.timer = timer
+        self.sleep = sleep
+        self.queue = []
+        self.pins = set()
+
+        # timing error statistics, in seconds
+        self.write_count = 0
+        self.error_sum = 0.0
+        self.error_max = 0.0
+
+    def ticks(self, seconds):
+        return max(1, int(round(seconds / self.resolution)))
+
+    def add(self, pin, waveform, start=0):
+        if not 0 <= pin < len(self.model.layout):
+            raise ValueError('No pin #{}'.format(pin + 1))
+        if pin in self.pins:
+            raise ValueError('Pin #{} already has a waveform'.format(pin + 1))
+
+        OUT = self.model.gpio.OUT
+        self.model.set_direction(pin, OUT)
+        if self.model.directions[pin] != OUT:
+            raise ValueError('Pin #{} cannot be used as an output'
+                             .format(pin + 1))
+
+        self.pins.add(pin)
+
+        # pins are unique, so iterators never get compared
+        heappush(self.queue, (start, pin, iter(waveform)))
+
+    @property
+    def mean_error(self):
+        if not self.write_count:
+            return 0.0
+        return self.error_sum / self.write_count
+
+    def run(self, duration=None):
+        """Runs until all waveforms are exhausted or ``duration`` seconds
+        have passed."""
+
+        queue = self.queue
+        res = self.resolution
+        timer, sleep = self.timer, self.sleep
+        set_output_values = self.model.set_output_values
+        out_values = self.model.out_values
+
+        end_tick = None if duration is None else int(duration / res)
+        start = timer()
+
+        try:
+            while queue:
+                tick = queue[0][0]
+                if end_tick is not None and tick > end_tick:
+                    break
+
+                due = start + tick * res
+                rem = due - timer()
+                if rem > 0:
+                    sleep(rem)
+
+                pins, values = [], []
+                while queue and queue[0][0] == tick:
+                    _, pin, it = heappop(queue)
+
+                    for value, hold in it:
+                        if out_values[pin] != value:
+                            pins.append(pin)
+                            values.append(value)
+                        heappush(queue, (tick + hold, pin, it))
+                        break
+
+                if pins:
+                    set_output_values(pins, values)
+
+                    error = timer() - due
+                    self.write_count += 1
+                    self.error_sum += error
+                    if error > self.error_max:
+                        self.error_max = error
+        finally:
+            # also report when interrupted, e.g. by Ctrl-C
+            log.info('{} writes, timing error mean {:.1f} us, max {:.1f} us'
+                     .format(self.write_count, self.mean_error * 1e6,
+                             self.error_max * 1e6))
+
+
+def parse_waveform(spec, generator):
+    """Parses a waveform specification and returns a ``(pin, waveform)``
+    tuple. Pins are given by their board number, frequencies in Hz.
+
+    * ``pwm:12:1000:0.25`` -- 1 kHz PWM with 25% duty cycle on pin 12.
+    * ``square:12:50`` -- 50 Hz square wave on pin 12.
+    * ``pattern:12:1011001:100`` -- bit pattern at 100 bits/s on pin 12.
+    """
+
+    parts = spec.split(':')
+    kind, args = parts[0], parts[1:]
+
+    try:
+        pin = int(args[0]) - 1
+
+        if kind == 'pwm' and len(args) == 3:
+            waveform = PWM(generator.ticks(1.0 / float(args[1])),
+                           float(args[2]))
+        elif kind == 'square' and len(args) == 2:
+            waveform = SquareWave(generator.ticks(1.0 / float(args[1])))
+        elif kind == 'pattern' and len(args) == 3:
+            if not args[1] or set(args[1]) - set('01'):
+                raise ValueError
+            waveform = BitPattern(args[1],
+                                  generator.ticks(1.0 / float(args[2])))
+        else:
+            raise ValueError
+    except (IndexError, ValueError, ZeroDivisionError):
+        raise ValueError('Invalid waveform: {}'.format(spec))
+
+    if pin < 0:
+        raise ValueError('Invalid pin number: {}'.format(args[0]))
+
+    return pin, waveform
@@ -0,0 +1,43 @@
+LOW_CHAR = '_'
+HIGH_CHAR = '-'
+
+# rendered form of every byte, most significant (oldest) bit first
+_CHUNKS = [''.join(HIGH_CHAR if b >> n & 1 else LOW_CHAR
+                   for n in range(7, -1, -1))
+           for b in range(256)]
+
+
+class PinHistory(object):
+    """Keeps the last ``width`` samples of every pin as a packed integer,
+    bit 0 being the most recent sample.
+
+    :param num_pins: Number of pins to track.
+    :param width: Number of samples to keep per pin.
+    """
+
+    def __init__(self, num_pins, width=32):
+        self.width = width
+        self.mask = (1 << width) - 1
+        self.bits = [0] * num_pins
+
+    def sample(self, state, count=1):
+        """Shifts the packed pin ``state`` into the history of each pin,
+        ``count`` times, e.g. to fill in missed samples."""
+        count = min(count, self.width)
+        if count < 1:
+            return
+
+        mask, ones = self.mask, (1 << count) - 1
+        self.bits = [(h << count | (ones if state >> pin & 1 else 0)) & mask
+                     for pin, h in enumerate(self.bits)]
+
+    def sparkline(self, pin, width=None):
+        """Renders the last ``width`` samples of ``pin``, oldest first."""
+        if width is None or width > self.width:
+            width = self.width
+
+        h = self.bits[pin]
+        chunks = (width + 7) // 8
+        line = ''.join(_CHUNKS[h >> (8 * n) & 0xff]
+                       for n in range(chunks - 1, -1, -1))
+        return line[-width:] if width else ''
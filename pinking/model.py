@@ -4,6 +4,8 @@ from blinker import Signal
 from logbook import Logger
 
 from .exc import LayoutNotFoundError
+from .expander import ExpanderBanks
+from .history import PinHistory
 
 
 PIN_LAYOUT = {
@@ -56,7 +58,7 @@ class PinKingModel(object):
     in_values_changed = Signal(doc='``values`` changed')
     out_values_changed = Signal(doc='``values`` changed')
 
-    def __init__(self, gpio, rev):
+    def __init__(self, gpio, rev, expanders=()):
         super(PinKingModel, self).__init__()
         self.rev = rev
         try:
@@ -64,10 +66,19 @@ class PinKingModel(object):
         except KeyError as e:
             raise LayoutNotFoundError(e)
 
+        # pins past the header are provided by I/O expanders
+        self.header_len = len(self.layout)
+        self.expanders = ExpanderBanks(expanders, self.header_len)
+        if self.expanders:
+            self.layout = self.layout + self.expanders.layout
+
         self.selected_pin = 0
         self.directions = [None] * len(self.layout)
         self.out_values = [0] * len(self.layout)
         self.in_values = [0] * len(self.layout)
+        self.in_state = 0
+        self.out_state = 0
+        self.history = None
         self.gpio = gpio
 
         # set GPIO mode to board numbering
@@ -80,6 +91,11 @@ class PinKingModel(object):
         # read initial set of input values
         self.read_input_values()
 
+    def cleanup(self):
+        """Resets GPIO pins and stops polling expanders."""
+        self.expanders.close()
+        self.gpio.cleanup()
+
     def set_direction(self, pin, direction):
         GPIO = self.gpio
 
@@ -90,7 +106,16 @@ class PinKingModel(object):
         prev_direction = self.directions[pin]
         self.directions[pin] = direction
 
-        GPIO.setup(pin + 1, direction, pull_up_down=self.gpio.PUD_DOWN)
+        # packed output state only covers pins that are outputs
+        if direction == GPIO.OUT and self.out_values[pin]:
+            self.out_state |= 1 << pin
+        else:
+            self.out_state &= ~(1 << pin)
+
+        if pin < self.header_len:
+            GPIO.setup(pin + 1, direction, pull_up_down=self.gpio.PUD_DOWN)
+        else:
+            self.expanders.setup(pin, direction == GPIO.IN)
 
         if prev_direction != direction:
             self.direction_changed.send(self, pin=pin, direction=direction)
@@ -98,23 +123,98 @@ class PinKingModel(object):
     def set_output_value(self, pin, value):
         prev_value = self.out_values[pin]
         self.out_values[pin] = value
-        self.gpio.output(pin + 1, value)
+        self._update_out_state(pin, value)
+
+        if pin < self.header_len:
+            self.gpio.output(pin + 1, value)
+        else:
+            self.expanders.output([pin], [value])
 
         if prev_value != value:
             self.out_values_changed.send(self, values=self.out_values)
 
+    def set_output_values(self, pins, values):
+        """Sets several output pins using a single bulk write."""
+        out_values = self.out_values
+        changed = False
+
+        for pin, value in zip(pins, values):
+            if out_values[pin] != value:
+                out_values[pin] = value
+                self._update_out_state(pin, value)
+                changed = True
+
+        header_len = self.header_len
+        if not self.expanders:
+            self.gpio.output([pin + 1 for pin in pins], list(values))
+        else:
+            channels, header_values = [], []
+            ex_pins, ex_values = [], []
+
+            for pin, value in zip(pins, values):
+                if pin < header_len:
+                    channels.append(pin + 1)
+                    header_values.append(value)
+                else:
+                    ex_pins.append(pin)
+                    ex_values.append(value)
+
+            if channels:
+                self.gpio.output(channels, header_values)
+            if ex_pins:
+                self.expanders.output(ex_pins, ex_values)
+
+        if changed:
+            self.out_values_changed.send(self, values=out_values)
+
+    def _update_out_state(self, pin, value):
+        if value and self.directions[pin] == self.gpio.OUT:
+            self.out_state |= 1 << pin
+        else:
+            self.out_state &= ~(1 << pin)
+
+    def enable_history(self, width=32):
+        """Keeps the last ``width`` samples of every pin, updated on each
+        call to :meth:`read_input_values`."""
+        self.history = PinHistory(len(self.layout), width)
+
     def read_input_values(self):
         values = []
+        state = 0
 
         IN = self.gpio.IN
         input = self.gpio.input
 
-        for pin, direction in enumerate(self.directions):
+        directions = self.directions
+        header_len = self.header_len
+
+        for pin, direction in enumerate(directions[:header_len]):
             if direction == IN:
-                values.append(input(pin + 1))
+                value = input(pin + 1)
+                values.append(value)
+
+                if value:
+                    state |= 1 << pin
             else:
                 values.append(None)
 
+        if self.expanders:
+            # a single bulk read per expander bank
+            ex_state = self.expanders.read()
+            state |= ex_state
+
+            for pin in xrange(header_len, len(directions)):
+                if directions[pin] == IN:
+                    values.append(ex_state >> pin & 1)
+                else:
+                    values.append(None)
+
+        # packed input state, bit n is set if pin n + 1 is high
+        self.in_state = state
+
+        if self.history is not None:
+            self.history.sample(state | self.out_state)
+
         if values != self.in_values:
             self.in_values = values
             self.in_values_changed.send(self, values=values)
@@ -0,0 +1,154 @@
+from collections import deque
+import json
+import threading
+
+from .capture import pack_header, pack_record, state_size
+
+
+# formats turn a batch of ``(timestamp, state)`` change records into bytes,
+# bit n of each state corresponding to pin n + 1
+
+
+class JSONLFormat(object):
+    def __init__(self, layout):
+        self.num_pins = len(layout)
+        self.prev = None
+
+    def header(self):
+        return b''
+
+    def format(self, records):
+        lines = []
+        prev = self.prev
+        pins = range(self.num_pins)
+
+        for timestamp, state in records:
+            # nothing has changed before the first record
+            if prev is None:
+                prev = state
+
+            changed = prev ^ state
+            lines.append(json.dumps({
+                't': timestamp,
+                'state': state,
+                'changed': [pin + 1 for pin in pins if changed >> pin & 1],
+            }, separators=(',', ':')))
+            prev = state
+
+        self.prev = prev
+        return (''.join(line + '\n' for line in lines)).encode('ascii')
+
+
+class CSVFormat(object):
+    def __init__(self, layout):
+        self.layout = layout
+
+    def header(self):
+        return ('t,' + ','.join('{}:{}'.format(pin + 1, name)
+                                for pin, name in enumerate(self.layout)) +
+                '\n').encode('ascii')
+
+    def format(self, records):
+        pins = range(len(self.layout))
+        return (''.join(
+            '{!r},{}\n'.format(timestamp, ','.join(
+                '1' if state >> pin & 1 else '0' for pin in pins))
+            for timestamp, state in records
+        )).encode('ascii')
+
+
+class BinaryFormat(object):
+    """Same format as trigger captures, see :mod:`pinking.capture`."""
+
+    def __init__(self, layout):
+        self.num_pins = len(layout)
+        self.size = state_size(self.num_pins)
+
+    def header(self):
+        return pack_header(self.num_pins)
+
+    def format(self, records):
+        size = self.size
+        return b''.join(pack_record(timestamp, state, size)
+                        for timestamp, state in records)
+
+
+FORMATS = {
+    'jsonl': JSONLFormat,
+    'csv': CSVFormat,
+    'binary': BinaryFormat,
+}
+
+
+class BufferedRecordWriter(object):
+    """Collects change records and writes them from a background thread.
+
+    :meth:`write` only appends to a queue, formatting and writing to ``fp``
+    happen every ``flush_interval`` seconds in a separate thread, so a slow
+    consumer never stalls the caller. Records are never dropped.
+
+    If writing fails, e.g. because the reading end of a pipe was closed, the
+    thread stops and the exception is stored in :attr:`error`; callers should
+    check it and stop producing records. This includes writing the header,
+    in which case the thread is never started.
+    """
+
+    def __init__(self, fp, fmt, flush_interval=0.1):
+        self.fp = fp
+        self.fmt = fmt
+        self.flush_interval = flush_interval
+        self.pending = deque()
+        self.record_count = 0
+        self.error = None
+        self._stop = threading.Event()
+
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+
+        try:
+            fp.write(fmt.header())
+        except Exception as e:
+            self.error = e
+        else:
+            self._thread.start()
+
+    def write(self, timestamp, state):
+        # deque.append is thread-safe
+        self.pending.append((timestamp, state))
+
+    def _drain(self):
+        pending = self.pending
+        records = []
+
+        try:
+            while True:
+                records.append(pending.popleft())
+        except IndexError:
+            pass
+
+        if records:
+            self.fp.write(self.fmt.format(records))
+            self.fp.flush()
+            self.record_count += len(records)
+
+    def _drain_safe(self):
+        try:
+            self._drain()
+        except Exception as e:
+            # not just I/O errors, any exception escaping here would end
+            # the thread silently while records keep piling up
+            self.error = e
+            self.pending.clear()
+
+    def _run(self):
+        while self.error is None and \
+                not self._stop.wait(self.flush_interval):
+            self._drain_safe()
+
+    def close(self):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+        if self.error is None:
+            self._drain_safe()
@@ -0,0 +1,126 @@
+import re
+
+from .dispatch import LATEST
+
+
+# state filters, selected by a leading colon, e.g. ":high"
+STATE_FILTERS = ('in', 'out', 'high', 'low')
+
+
+class PinView(object):
+    """A scrollable, filtered window onto the pins of a model.
+
+    Pins are displayed two per row, like the header. Filtering works on
+    whole rows and is only recomputed when the filter or the pin state
+    changes, so drawing a frame only touches the ``height`` visible rows, no
+    matter how many pins there are.
+
+    Model changes only mark the view as stale; state filters are reapplied
+    by :meth:`visible`, so all filtering happens on the thread drawing the
+    view.
+
+    :param model: A :class:`~pinking.model.PinKingModel`.
+    :param height: Number of rows that fit on screen.
+    :param dispatcher: If given, a :class:`~pinking.dispatch.Dispatcher`
+                       used to receive model changes outside of the sampling
+                       path.
+    """
+
+    def __init__(self, model, height, dispatcher=None):
+        self.model = model
+        self.height = height
+        self.offset = 0
+        self.query = ''
+        self.stale = False
+
+        layout = model.layout
+        self.num_rows = len(layout) // 2 + len(layout) % 2
+
+        # name index: full names and their prefixes (``GPIO``, ``E20``, ...)
+        # map to the rows containing them
+        self.names = [name.lower() for name in layout]
+        self.name_index = {}
+        for pin, name in enumerate(self.names):
+            for key in set([name, re.split(r'[\d.]', name, 1)[0],
+                            name.split('.', 1)[0]]):
+                if key:
+                    self.name_index.setdefault(key, set()).add(pin // 2)
+
+        self.rows = range(self.num_rows)
+
+        for signal in (model.direction_changed, model.in_values_changed,
+                       model.out_values_changed):
+            if dispatcher is None:
+                signal.connect(self._on_state_change)
+            else:
+                dispatcher.subscribe(signal, self._on_state_change, LATEST,
+                                     name='PinView')
+
+    def __len__(self):
+        return len(self.rows)
+
+    def set_filter(self, query):
+        self.query = query.strip().lower()
+        self.refilter()
+
+    def refilter(self):
+        query = self.query
+
+        if not query:
+            rows = range(self.num_rows)
+        elif query.startswith(':') and query[1:] in STATE_FILTERS:
+            mask = self._state_mask(query[1:])
+            rows = [row for row in xrange(self.num_rows)
+                    if mask >> (2 * row) & 3]
+        elif query in self.name_index:
+            rows = sorted(self.name_index[query])
+        else:
+            rows = sorted(set(pin // 2 for pin, name in enumerate(self.names)
+                              if query in name))
+
+        self.rows = rows
+        self.scroll(0)
+
+    def _state_mask(self, kind):
+        model = self.model
+        IN, OUT = model.gpio.IN, model.gpio.OUT
+
+        if kind in ('in', 'out'):
+            direction = IN if kind == 'in' else OUT
+            pins = (pin for pin, d in enumerate(model.directions)
+                    if d == direction)
+        else:
+            level = 1 if kind == 'high' else 0
+            pins = (pin for pin, d in enumerate(model.directions)
+                    if (d == IN and model.in_values[pin] == level) or
+                    (d == OUT and model.out_values[pin] == level))
+
+        mask = 0
+        for pin in pins:
+            mask |= 1 << pin
+        return mask
+
+    def _on_state_change(self, model, **kwargs):
+        self.stale = True
+
+    def refresh(self):
+        """Reapplies a state filter if pins changed since the last call."""
+        if self.stale:
+            self.stale = False
+
+            # only state filters depend on pin values
+            if self.query.startswith(':'):
+                self.refilter()
+
+    def resize(self, height):
+        self.height = height
+        self.scroll(0)
+
+    def scroll(self, delta):
+        max_offset = max(0, len(self.rows) - self.height)
+        self.offset = min(max(0, self.offset + delta), max_offset)
+
+    def visible(self):
+        """Returns the row numbers to draw, top to bottom."""
+        self.refresh()
+        return self.rows[self.offset:self.offset + self.height]
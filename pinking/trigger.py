@@ -0,0 +1,182 @@
+from collections import deque
+
+from logbook import Logger
+
+
+log = Logger('trigger')
+
+
+class PatternTrigger(object):
+    """Fires when the pins selected by ``mask`` start to match ``value``.
+
+    :param mask: Packed pin state mask, bit ``n`` selects pin ``n + 1``.
+    :param value: Packed pin state the masked pins are compared against.
+    """
+
+    def __init__(self, mask, value):
+        self.mask = mask
+        self.value = value & mask
+
+    def __call__(self, prev, state):
+        mask, value = self.mask, self.value
+        return (state & mask) == value and (prev & mask) != value
+
+    def __repr__(self):
+        return '{}(mask={:#x}, value={:#x})'.format(
+            self.__class__.__name__, self.mask, self.value)
+
+
+class EdgeTrigger(object):
+    """Fires on a rising and/or falling edge on any of the pins in ``mask``.
+    """
+
+    def __init__(self, mask, rising=True, falling=True):
+        self.mask = mask
+        self.rise_mask = mask if rising else 0
+        self.fall_mask = mask if falling else 0
+
+    def __call__(self, prev, state):
+        return bool((prev ^ state) &
+                    (state & self.rise_mask | prev & self.fall_mask))
+
+    def __repr__(self):
+        return '{}(rise_mask={:#x}, fall_mask={:#x})'.format(
+            self.__class__.__name__, self.rise_mask, self.fall_mask)
+
+
+def parse_trigger(spec):
+    """Parses a trigger specification. Pins are given by their board number.
+
+    * ``rising:12``, ``falling:12`` or ``edge:12,16`` create an
+      :class:`EdgeTrigger`.
+    * ``12=1,16=0`` creates a :class:`PatternTrigger` that fires once pin 12
+      is high and pin 16 is low.
+    """
+
+    def pin_bit(num):
+        pin = int(num)
+        if pin < 1:
+            raise ValueError('Invalid pin number: {}'.format(num))
+        return 1 << (pin - 1)
+
+    if ':' in spec:
+        kind, pins = spec.split(':', 1)
+
+        mask = 0
+        for num in pins.split(','):
+            mask |= pin_bit(num)
+
+        if kind == 'rising':
+            return EdgeTrigger(mask, falling=False)
+        if kind == 'falling':
+            return EdgeTrigger(mask, rising=False)
+        if kind == 'edge':
+            return EdgeTrigger(mask)
+        raise ValueError('Unknown edge type: {}'.format(kind))
+
+    mask = value = 0
+    for cond in spec.split(','):
+        num, _, level = cond.partition('=')
+        if level not in ('0', '1'):
+            raise ValueError('Invalid pin condition: {}'.format(cond))
+
+        bit = pin_bit(num)
+        mask |= bit
+        if level == '1':
+            value |= bit
+
+    return PatternTrigger(mask, value)
+
+
+def check_trigger_pins(triggers, model):
+    """Raises :class:`ValueError` if any of ``triggers`` watches a pin that
+    does not exist or is not sampled as an input by ``model``, as such a
+    trigger could never fire."""
+
+    IN = model.gpio.IN
+
+    for trigger in triggers:
+        mask, pin = trigger.mask, 0
+        while mask:
+            if mask & 1:
+                if pin >= len(model.layout):
+                    raise ValueError('No pin #{}'.format(pin + 1))
+                if model.directions[pin] != IN:
+                    raise ValueError('Pin #{} ({}) is not an input'.format(
+                        pin + 1, model.layout[pin]))
+            mask >>= 1
+            pin += 1
+
+
+class TriggerCapture(object):
+    """Watches a stream of packed pin states and writes only the samples
+    around each trigger event to ``writer``.
+
+    The last ``pre`` samples are kept in a ring buffer, once a trigger fires
+    these are written out, followed by the next ``post`` samples. A trigger
+    firing while a window is still open extends it. The writer is flushed
+    whenever a window closes.
+
+    :param triggers: Triggers, called as ``trigger(prev_state, state)``.
+    :param writer: A :class:`~pinking.capture.CaptureWriter`.
+    """
+
+    def __init__(self, triggers, writer, pre=1000, post=1000):
+        self.writer = writer
+        self.post = post
+        self.ring = deque(maxlen=pre)
+        self.remaining = 0
+        self.trigger_count = 0
+        self.prev = None
+
+        # all edge triggers are folded into a single pair of masks, so
+        # checking them costs the same no matter how many there are
+        self.rise_mask = self.fall_mask = 0
+        self.patterns = []
+
+        for trigger in triggers:
+            if isinstance(trigger, EdgeTrigger):
+                self.rise_mask |= trigger.rise_mask
+                self.fall_mask |= trigger.fall_mask
+            else:
+                self.patterns.append(trigger)
+
+    def fired(self, prev, state):
+        if (prev ^ state) & (state & self.rise_mask | prev & self.fall_mask):
+            return True
+
+        for trigger in self.patterns:
+            if trigger(prev, state):
+                return True
+
+        return False
+
+    def sample(self, timestamp, state):
+        prev = self.prev
+        self.prev = state
+
+        triggered = prev is not None and self.fired(prev, state)
+
+        if triggered:
+            self.trigger_count += 1
+            log.info('Trigger #{} at {:.6f}'.format(self.trigger_count,
+                                                     timestamp))
+
+            if not self.remaining:
+                # start a new window with the pre-trigger history
+                self.writer.mark()
+                write = self.writer.write
+                for rec in self.ring:
+                    write(*rec)
+                self.ring.clear()
+
+            self.remaining = self.post + 1
+
+        if self.remaining:
+            self.writer.write(timestamp, state)
+            self.remaining -= 1
+
+            if not self.remaining:
+                self.writer.flush()
+        else:
+            self.ring.append((timestamp, state))
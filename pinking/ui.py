@@ -1,11 +1,16 @@
 import curses
 import threading
-from Queue import Queue
+from Queue import Empty, Queue
 import sys
 
 from blinker import Signal
 from logbook import Logger
 
+from .dispatch import Dispatcher
+from .model import RESERVED_PINS
+from .pinview import PinView, STATE_FILTERS
+from .util import clock
+
 
 log = Logger('ui')
 
@@ -88,93 +93,199 @@ class Widget(object):
 
 
 class PinWindow(Widget):
-    def __init__(self, scr, model):
+    def __init__(self, scr, model, spark_width=None, dispatcher=None):
+        super(PinWindow, self).__init__()
         self.scr = scr
         self.model = model
-        model.register_observer(self.redraw)
+
+        # model changes are handled outside of the sampling path
+        if dispatcher is None:
+            dispatcher = Dispatcher()
+        self.dispatcher = dispatcher
+
+        # only the rows that fit into the window are ever drawn
+        self.view = PinView(model, self.height, dispatcher)
+
+        # maximum width required for any label
+        self.label_width = max(len(n) for n in model.layout)
+
+        # name filter being typed in, None if not editing
+        self.filter_input = None
+
+        # sparkline width, if the model keeps a pin history
+        if not model.history:
+            spark_width = 0
+        elif spark_width is None:
+            spark_width = model.history.width
+        self.spark_width = spark_width
+
+        # no subscriptions of its own, PinKingUI marks the window for redraw
+        # after every sample
         self.redraw()
 
+    def _edit_filter(self, keycode):
+        if keycode in (ord('\n'), curses.KEY_ENTER):
+            self.filter_input = None
+        elif keycode == 27:
+            # escape cancels and clears the filter
+            self.filter_input = None
+            self.view.set_filter('')
+        elif keycode in (curses.KEY_BACKSPACE, 127, 8):
+            self.filter_input = self.filter_input[:-1]
+            self.view.set_filter(self.filter_input)
+        elif 32 <= keycode < 127:
+            self.filter_input += chr(keycode)
+            self.view.set_filter(self.filter_input)
+        else:
+            return False
+
+        self.update()
+        return True
+
+    def handle_keypress(self, keycode):
+        view = self.view
+
+        if self.filter_input is not None:
+            return self._edit_filter(keycode)
+
+        if keycode == ord('/'):
+            # filter by name (or state, e.g. ":high"), applied while typing
+            self.filter_input = view.query
+        elif keycode == ord('j') or keycode == curses.KEY_DOWN:
+            view.scroll(1)
+        elif keycode == ord('k') or keycode == curses.KEY_UP:
+            view.scroll(-1)
+        elif keycode == curses.KEY_NPAGE:
+            view.scroll(view.height)
+        elif keycode == curses.KEY_PPAGE:
+            view.scroll(-view.height)
+        elif keycode == ord('f'):
+            # cycle through state filters
+            filters = ('',) + tuple(':' + f for f in STATE_FILTERS)
+            view.set_filter(filters[(filters.index(view.query) + 1)
+                                    % len(filters)]
+                            if view.query in filters else '')
+        else:
+            return False
+
+        self.update()
+        return True
+
     def redraw(self):
         layout = self.model.layout
         selected = self.model.selected_pin
+        gpio = self.model.gpio
         scr = self.scr
         scr.clear()
 
-        # calculate the maximum width required for any label
-        label_width = max(len(n) for n in layout)
+        label_width = self.label_width
 
         # label format left and right
         lfmt = ('{:>%d}' % label_width,
                 '{:<%d}' % label_width)
-        pfmt = '[{:2}]'
-
-        for pin, name in enumerate(layout):
-            row = pin // 2
-            col = pin % 2
-
-            color = curses.color_pair(0)
-            extra_label = color
-            extra_pin = color
-
-            if pin == selected:
-                extra_label = curses.A_BOLD
-                extra_pin = curses.A_BOLD
-
-            # direction
-            pdir = self.model.directions[pin]
-            value = None
-
-            if pdir == GPIO.IN:
-                color = curses.color_pair(6)
-                value = self.model.in_values[pin]
-            elif pdir == GPIO.OUT:
-                color = curses.color_pair(2)
-                value = self.model.out_values[pin]
-
-            # output or input value
-            if value == GPIO.HIGH:
-                extra_label |= curses.A_REVERSE
-                extra_pin |= curses.A_REVERSE
-
-            # special names
-            if name in ('5V', '3V3'):
-                color = curses.color_pair(1)
-            elif name == 'GND':
-                color = curses.color_pair(3)
-
-            # add colors
-            extra_label |= color
-
-            label = lfmt[col].format(layout[pin])
-            scr.addstr(row, col * (label_width + 11), label, extra_label)
-
-            # draw pin:
-            num = pfmt.format(pin + 1)
-            scr.addstr(row, label_width + 1 + col * 5, num, extra_pin)
+        pfmt = '[{:3}]'
+
+        history = self.model.history
+        sw = self.spark_width
+        base = sw + 1 if sw else 0
+
+        for line, row in enumerate(self.view.visible()):
+            for col in (0, 1):
+                pin = 2 * row + col
+                if pin >= len(layout):
+                    break
+
+                name = layout[pin]
+
+                color = curses.color_pair(0)
+                extra_label = color
+                extra_pin = color
+
+                if pin == selected:
+                    extra_label = curses.A_BOLD
+                    extra_pin = curses.A_BOLD
+
+                # direction
+                pdir = self.model.directions[pin]
+                value = None
+
+                if pdir == gpio.IN:
+                    color = curses.color_pair(6)
+                    value = self.model.in_values[pin]
+                elif pdir == gpio.OUT:
+                    color = curses.color_pair(2)
+                    value = self.model.out_values[pin]
+
+                # output or input value
+                if value == gpio.HIGH:
+                    extra_label |= curses.A_REVERSE
+                    extra_pin |= curses.A_REVERSE
+
+                # special names
+                if name in ('5V', '3V3'):
+                    color = curses.color_pair(1)
+                elif name == 'GND':
+                    color = curses.color_pair(3)
+
+                # add colors
+                extra_label |= color
+
+                label = lfmt[col].format(name)
+                scr.addstr(line, base + col * (label_width + 13), label,
+                           extra_label)
+
+                # draw pin:
+                num = pfmt.format(pin + 1)
+                scr.addstr(line, base + label_width + 1 + col * 6, num,
+                           extra_pin)
+
+                # recent history, to the outside of the label
+                if sw and name not in RESERVED_PINS:
+                    scr.addstr(line, col * (base + 2 * label_width + 14),
+                               history.sparkline(pin, sw), color)
+
+        if self.filter_input is not None:
+            scr.addnstr(self.height - 1, 0,
+                        '/' + self.filter_input + ' ' * self.width,
+                        self.width - 1, curses.A_REVERSE)
 
         scr.refresh()
+        self.needs_redraw = False
 
     @classmethod
-    def from_model(cls, model, y=0, x=0):
+    def from_model(cls, model, y=0, x=0, max_height=None, dispatcher=None):
         label_width = max(len(n) for n in model.layout)
 
-        w = 2 * label_width + 12
+        w = 2 * label_width + 14
+
+        # shorten sparklines to fit the screen
+        spark_width = 0
+        if model.history:
+            spark_width = max(0, min(model.history.width,
+                                     (curses.COLS - x - w) // 2 - 1))
+            if spark_width:
+                w += 2 * (spark_width + 1)
         mlen = len(model.layout)
-        h = mlen // 2
+
+        # never larger than the screen, the view scrolls instead
+        if max_height is None:
+            max_height = curses.LINES - y
+        h = max(1, min(mlen // 2 + mlen % 2, max_height))
 
         scr = curses.newwin(h, w, y, x)
 
-        return cls(scr, model)
+        return cls(scr, model, spark_width, dispatcher)
 
 
 class PinKingUI(Widget):
     keypress = Signal(doc='Key with ``keycode`` was pressed')
 
-    def __init__(self, scr, model):
+    def __init__(self, scr, model, poll_freq=10.0):
         super(PinKingUI, self).__init__()
 
         self.scr = scr
         self.model = model
+        self.poll_freq = poll_freq
         self.events = Queue()
 
         # start listening to keyboard events
@@ -197,7 +308,17 @@ class PinKingUI(Widget):
         curses.init_pair(7, curses.COLOR_WHITE, -1)
 
         # instantiate ui windows
-        # PinWindow.from_model(pm)
+        model.enable_history()
+        self.dispatcher = Dispatcher()
+        self.pin_window = PinWindow.from_model(model,
+                                               dispatcher=self.dispatcher)
+        self.keypress.connect(self._on_keypress)
+
+        # sample inputs in the background, independent of key handling
+        self.running = True
+        self.poll_thread = threading.Thread(target=self._poll)
+        self.poll_thread.daemon = True
+        self.poll_thread.start()
 
         # add logging window
         # LogWindow(curses.newwin(self.height - pw.height - 1,
@@ -208,24 +329,59 @@ class PinKingUI(Widget):
     def run(self):
         log.debug('Starting GUI event loop...')
 
-        while True:
+        while self.running:
             # redraw all widgets that need redrawing in the gui thread
             for widget in self.widgets:
                 if widget.needs_redraw:
                     widget.redraw()
 
-            event_count = 0
-            for i in xrange(100):  # every 100 events, we check for gui updates
-                                   # or once we handled all of
-            while not self.events.empty():
-                event
-                # get next event
-                ev = self.events.get()
+            # wait for the next event, then handle whatever else is queued
+            # up before redrawing
+            try:
+                ev = self.events.get(timeout=0.1)
+            except Empty:
+                continue
 
+            while True:
                 if 'keypress' == ev[0]:
-                    self.keypress.send(self, ev[1])
+                    self.keypress.send(self, keycode=ev[1])
                 else:
-                    raise RuntimeError('Received unexpected event {}'.format(ev))
+                    raise RuntimeError('Received unexpected event {}'
+                                       .format(ev))
+
+                try:
+                    ev = self.events.get_nowait()
+                except Empty:
+                    break
+
+        # stop sampling before the model gets cleaned up
+        self.poll_thread.join()
+        self.dispatcher.close()
+
+    def _poll(self):
+        model = self.model
+
+        # sample on a fixed clock, so the pin history has a uniform time axis
+        for missed_ticks in clock(1.0 / self.poll_freq):
+            if not self.running:
+                break
+
+            if missed_ticks and model.history is not None:
+                # repeat the last known state for samples we missed
+                model.history.sample(model.in_state | model.out_state,
+                                     missed_ticks)
+
+            model.read_input_values()
+
+            # history scrolls even if no pin changed
+            self.pin_window.update()
+
+    def _on_keypress(self, ui, keycode):
+        if self.pin_window.handle_keypress(keycode):
+            return
+
+        if keycode == ord('q'):
+            self.running = False
 
     def _read_keypress(self):
         scr, q = self.scr, self.events
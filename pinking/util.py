@@ -28,12 +28,15 @@ def curses_wrap():
     except:
         pass
 
-    yield stdscr
-
-    stdscr.keypad(0)
-    curses.echo()
-    curses.nocbreak()
-    curses.endwin()
+    # restore the terminal even if the UI is left through an exception,
+    # e.g. on Ctrl-C
+    try:
+        yield stdscr
+    finally:
+        stdscr.keypad(0)
+        curses.echo()
+        curses.nocbreak()
+        curses.endwin()
 
 
 def clock(slice_len=1):
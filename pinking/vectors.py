@@ -0,0 +1,190 @@
+import time
+
+
+class VectorError(ValueError):
+    def __init__(self, lineno, msg):
+        super(VectorError, self).__init__('line {}: {}'.format(lineno, msg))
+        self.lineno = lineno
+
+
+class Failure(object):
+    def __init__(self, lineno, expected, mask, actual):
+        self.lineno = lineno
+        self.expected = expected
+        self.mask = mask
+        self.actual = actual
+
+    @property
+    def mismatch(self):
+        return (self.actual ^ self.expected) & self.mask
+
+
+class VectorFile(object):
+    """A set of test vectors.
+
+    Vector files are line based, ``#`` starts a comment. Before the first
+    vector, the pins to drive and sample are listed by their board number::
+
+        outputs 11 12 13
+        inputs 15 16
+        settle 0.0005
+
+        # stimulus  expected
+        010         1x
+        110         01
+
+    Each vector line holds one bit per output, applied in a single write,
+    followed by one bit per input, which are sampled after ``settle``
+    seconds. An ``x`` marks an input that is not checked.
+    """
+
+    def __init__(self, outputs, inputs, vectors, settle=None):
+        self.outputs = outputs
+        self.inputs = inputs
+        self.vectors = vectors
+        self.settle = settle
+
+    @classmethod
+    def parse(cls, fp):
+        outputs = inputs = settle = None
+        vectors = []
+
+        def parse_pins(lineno, args):
+            try:
+                pins = [int(a) - 1 for a in args]
+            except ValueError:
+                raise VectorError(lineno, 'Invalid pin number')
+            if any(pin < 0 for pin in pins):
+                raise VectorError(lineno, 'Invalid pin number')
+            return pins
+
+        for lineno, line in enumerate(fp, 1):
+            parts = line.split('#', 1)[0].split()
+            if not parts:
+                continue
+
+            if parts[0] in ('outputs', 'inputs'):
+                pins = parse_pins(lineno, parts[1:])
+                other = inputs if parts[0] == 'outputs' else outputs
+
+                both = set(pins) & set(other or ())
+                if both:
+                    raise VectorError(lineno, 'Pins used as both output and '
+                                              'input: {}'.format(', '.join(
+                                                  str(pin + 1)
+                                                  for pin in sorted(both))))
+
+                if parts[0] == 'outputs':
+                    outputs = pins
+                else:
+                    inputs = pins
+                continue
+            if parts[0] == 'settle':
+                try:
+                    settle = float(parts[1])
+                except (IndexError, ValueError):
+                    raise VectorError(lineno, 'Invalid settle time')
+                continue
+
+            if outputs is None or inputs is None:
+                raise VectorError(lineno, 'Vector before outputs and inputs '
+                                          'are declared')
+
+            stimulus = parts[0]
+            response = parts[1] if len(parts) > 1 else ''
+
+            if len(parts) > 2 or len(stimulus) != len(outputs) or \
+                    len(response) != len(inputs) or \
+                    set(stimulus) - set('01') or \
+                    set(response) - set('01xX'):
+                raise VectorError(lineno, 'Malformed vector')
+
+            # expected inputs are packed, bit n corresponding to inputs[n]
+            expected = mask = 0
+            for n, c in enumerate(response):
+                if c in 'xX':
+                    continue
+                mask |= 1 << n
+                if c == '1':
+                    expected |= 1 << n
+
+            vectors.append((lineno, [int(c) for c in stimulus],
+                            expected, mask))
+
+        return cls(outputs or [], inputs or [], vectors, settle)
+
+
+class VectorRunner(object):
+    def __init__(self, model, vector_file, settle=0.0001, sleep=time.sleep):
+        self.model = model
+        self.vector_file = vector_file
+        self.settle = (vector_file.settle if vector_file.settle is not None
+                       else settle)
+        self.sleep = sleep
+
+        self.passed = 0
+        self.failures = []
+        self.elapsed = 0.0
+
+    def setup(self):
+        model, vf = self.model, self.vector_file
+        gpio = model.gpio
+
+        for pins, direction in ((vf.outputs, gpio.OUT),
+                                (vf.inputs, gpio.IN)):
+            for pin in pins:
+                if pin >= len(model.layout):
+                    raise ValueError('No pin #{}'.format(pin + 1))
+                model.set_direction(pin, direction)
+                if model.directions[pin] != direction:
+                    raise ValueError('Pin #{} ({}) cannot be used'.format(
+                        pin + 1, model.layout[pin]))
+
+    def run(self):
+        self.setup()
+
+        set_output_values = self.model.set_output_values
+        input = self.model.gpio.input
+        sleep, settle = self.sleep, self.settle
+        out_pins = self.vector_file.outputs
+        read_expanders = self.model.expanders.read
+        header_len = self.model.header_len
+
+        # header pins are read one by one, expander pins in bulk
+        in_channels, ex_inputs = [], []
+        for n, pin in enumerate(self.vector_file.inputs):
+            if pin < header_len:
+                in_channels.append((n, pin + 1))
+            else:
+                ex_inputs.append((n, pin))
+
+        failures = self.failures
+        passed = 0
+
+        start = time.time()
+        for lineno, stimulus, expected, mask in self.vector_file.vectors:
+            set_output_values(out_pins, stimulus)
+
+            if settle:
+                sleep(settle)
+
+            actual = 0
+            for n, channel in in_channels:
+                if input(channel):
+                    actual |= 1 << n
+
+            if ex_inputs:
+                ex_state = read_expanders()
+                for n, pin in ex_inputs:
+                    if ex_state >> pin & 1:
+                        actual |= 1 << n
+
+            if (actual ^ expected) & mask:
+                failures.append(Failure(lineno, expected, mask, actual))
+            else:
+                passed += 1
+
+        self.elapsed = time.time() - start
+        self.passed = passed
+
+        return not failures
@@ -22,6 +22,9 @@ setup(
     license='MIT',
     install_requires=['click', 'logbook', 'contextlib2', 'blinker',
                       'RPi.GPIO', 'urwid'],
+    extras_require={
+        'analyze': ['numpy'],
+    },
     packages=find_packages(exclude=['tests']),
     entry_points={
         'console_scripts': [
@@ -0,0 +1,16 @@
+import pytest
+
+from pinking.fakegpio import FakeGPIO
+from pinking.model import PinKingModel
+
+
+@pytest.fixture
+def gpio(monkeypatch):
+    # keep the background thread from flipping inputs during tests
+    monkeypatch.setattr(FakeGPIO, 'change_random_input_pin', lambda self: None)
+    return FakeGPIO()
+
+
+@pytest.fixture
+def model(gpio):
+    return PinKingModel(gpio, gpio.RPI_INFO['REVISION'])
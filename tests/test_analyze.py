@@ -0,0 +1,71 @@
+import pytest
+
+from pinking.capture import CaptureWriter, read_capture
+from pinking.trigger import EdgeTrigger, TriggerCapture
+
+np = pytest.importorskip('numpy')
+an = pytest.importorskip('pinking.analyze')
+
+
+def write_capture(path, windows, num_pins=16):
+    with open(str(path), 'wb') as fp:
+        writer = CaptureWriter(fp, num_pins)
+        for samples in windows:
+            writer.mark()
+            for rec in samples:
+                writer.write(*rec)
+    return str(path)
+
+
+def test_trigger_capture_marks_windows(tmpdir):
+    path = str(tmpdir.join('cap.bin'))
+    with open(path, 'wb') as fp:
+        capture = TriggerCapture([EdgeTrigger(1, falling=False)],
+                                 CaptureWriter(fp, 8), pre=1, post=1)
+        for n, state in enumerate([0, 1, 0, 0, 0, 1, 1]):
+            capture.sample(float(n), state)
+
+    with open(path, 'rb') as fp:
+        assert list(read_capture(fp)) == [(0.0, 0), (1.0, 1), (2.0, 0),
+                                          (4.0, 0), (5.0, 1), (6.0, 1)]
+
+    t, states, num_pins = an.load_capture(path)
+    assert [(w.start, w.stop) for w in an.split_windows(t)] == [(1, 4),
+                                                                (5, 8)]
+
+
+def test_windows_are_analyzed_separately(tmpdir):
+    # pin 1 is high at the end of the first and low at the start of the
+    # second window, which must not count as an edge
+    path = write_capture(tmpdir.join('cap.bin'), [
+        [(0.0, 0), (1.0, 1), (3.0, 0), (4.0, 1)],
+        [(100.0, 0), (102.0, 1), (103.0, 0)],
+    ])
+
+    t, states, num_pins = an.load_capture(path)
+    windows = an.split_windows(t)
+    assert [(w.start, w.stop) for w in windows] == [(1, 5), (6, 9)]
+
+    bits = an.pin_bits(states, 0)
+    rising, falling = an.per_window(an.edge_times, windows, t, bits)
+    assert list(rising) == [1.0, 4.0, 102.0]
+    assert list(falling) == [3.0, 103.0]
+
+    high, low = an.per_window(an.pulse_widths, windows, t, bits)
+    assert list(high) == [2.0, 1.0]
+    assert list(low) == [1.0]
+
+
+def test_changed_pins(tmpdir):
+    # pin 10 only differs across the window boundary
+    path = write_capture(tmpdir.join('cap.bin'), [
+        [(0.0, 1 << 9), (1.0, 1 << 9 | 1 << 2), (2.0, 1 << 9)],
+        [(10.0, 1 << 14), (11.0, 0)],
+    ])
+
+    t, states, num_pins = an.load_capture(path)
+    windows = an.split_windows(t)
+
+    assert an.changed_pins(states, windows, num_pins) == [2, 14]
+    assert an.changed_pins(states, windows, num_pins, chunk_size=1) == \
+        [2, 14]
@@ -0,0 +1,79 @@
+import threading
+
+from blinker import Signal
+
+from pinking.dispatch import DROP_OLDEST, LATEST, Dispatcher
+
+
+class BlockedReceiver(object):
+    """Blocks on the first signal until released, recording all values."""
+
+    def __init__(self):
+        self.values = []
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, sender, value):
+        self.entered.set()
+        self.release.wait()
+        self.values.append(value)
+
+
+def send_while_blocked(policy, count, maxlen=64):
+    signal = Signal()
+    receiver = BlockedReceiver()
+    dispatcher = Dispatcher()
+    sub = dispatcher.subscribe(signal, receiver, policy, maxlen,
+                               name='blocked')
+
+    # the first value is taken by the worker, which then blocks
+    signal.send(None, value=0)
+    assert receiver.entered.wait(5)
+
+    for n in range(1, count):
+        signal.send(None, value=n)
+
+    assert len(sub.queue) <= sub.maxlen
+    pending = len(sub.queue)
+
+    receiver.release.set()
+    dispatcher.close()
+    return dispatcher, receiver, pending
+
+
+def test_drop_oldest_is_bounded():
+    dispatcher, receiver, pending = send_while_blocked(DROP_OLDEST, 11,
+                                                       maxlen=4)
+
+    assert pending == 4
+    assert receiver.values == [0, 7, 8, 9, 10]
+    assert dispatcher.stats()[0]['dropped'] == 6
+
+
+def test_latest_coalesces():
+    dispatcher, receiver, pending = send_while_blocked(LATEST, 11)
+
+    assert pending == 1
+    assert receiver.values == [0, 10]
+    assert dispatcher.stats()[0]['dropped'] == 9
+
+
+def test_close_delivers_pending():
+    dispatcher, receiver, pending = send_while_blocked(DROP_OLDEST, 5)
+
+    assert pending == 4
+    assert receiver.values == [0, 1, 2, 3, 4]
+
+
+def test_stats():
+    dispatcher, receiver, pending = send_while_blocked(DROP_OLDEST, 6,
+                                                       maxlen=2)
+    stats, = dispatcher.stats()
+
+    assert stats['name'] == 'blocked'
+    assert stats['policy'] == DROP_OLDEST
+    assert stats['enqueued'] == 6
+    assert stats['delivered'] == 3
+    assert stats['dropped'] == 3
+    assert stats['pending'] == 0
+    assert 'mean_enqueue_us' in stats and 'mean_receiver_us' in stats
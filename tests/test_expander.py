@@ -0,0 +1,95 @@
+import sys
+import types
+
+import pytest
+
+from pinking.expander import (ExpanderBanks, MCP23017, PCF8574,
+                              SimulatedBus, SimulatedMCP23017,
+                              SimulatedPCF8574, parse_expanders)
+from pinking.model import PinKingModel
+
+
+@pytest.fixture
+def bus():
+    bus = SimulatedBus()
+    bus.attach(0x20, SimulatedMCP23017())
+    bus.attach(0x38, SimulatedPCF8574())
+    return bus
+
+
+def test_one_transaction_per_bank(bus):
+    banks = ExpanderBanks([MCP23017(bus, 0x20), PCF8574(bus, 0x38)], 40)
+
+    before = bus.transactions
+    banks.read()
+    assert bus.transactions - before == 2
+
+
+def test_bit_placement(bus):
+    banks = ExpanderBanks([MCP23017(bus, 0x20), PCF8574(bus, 0x38)], 40)
+    bus.devices[0x20].inputs = 0x8001
+    bus.devices[0x38].inputs = 0x80
+
+    state = banks.read()
+
+    # pins 41 (A0), 56 (B7) and 64 (P7)
+    assert [p + 1 for p in range(64) if state >> p & 1] == [41, 56, 64]
+
+
+def test_bulk_output(bus):
+    mcp = MCP23017(bus, 0x20)
+    banks = ExpanderBanks([mcp], 40)
+    banks.setup(41, False)
+    banks.setup(49, False)
+
+    before = bus.transactions
+    banks.output([41, 49], [1, 1])
+
+    assert bus.transactions - before == 1
+    assert bus.devices[0x20].registers[0x14:0x16] == bytearray([2, 2])
+
+
+def test_model_pins(gpio):
+    expanders = parse_expanders(['mcp23017:1:0x20', 'pcf8574:2:0x20'],
+                                simulate=True)
+    model = PinKingModel(gpio, gpio.RPI_INFO['REVISION'], expanders)
+
+    assert len(model.layout) == 40 + 16 + 8
+    assert model.layout[40] == 'E1-20.A0'
+    assert model.layout[56] == 'E2-20.P0'
+
+    # separate buses are polled in parallel
+    assert model.expanders.pool is not None
+
+    expanders[1].bus.devices[0x20].inputs = 0x01
+    model.read_input_values()
+    assert model.in_values[56] == 1
+    assert model.in_state >> 56 & 1
+
+    model.cleanup()
+    assert model.expanders.pool is None
+
+
+def test_same_address_on_different_buses():
+    names = [exp.name for exp in
+             parse_expanders(['pcf8574:1:0x38', 'pcf8574:2:0x38'],
+                             simulate=True)]
+    assert names == ['E1-38', 'E2-38']
+
+
+def test_duplicate_expander():
+    with pytest.raises(ValueError):
+        parse_expanders(['pcf8574:1:0x38', 'mcp23017:1:0x38'], simulate=True)
+
+
+def test_missing_bus(monkeypatch):
+    class SMBus(object):
+        def __init__(self, num):
+            raise IOError(2, 'No such file or directory')
+
+    smbus = types.ModuleType('smbus')
+    smbus.SMBus = SMBus
+    monkeypatch.setitem(sys.modules, 'smbus', smbus)
+
+    with pytest.raises(RuntimeError):
+        parse_expanders(['mcp23017:7:0x20'])
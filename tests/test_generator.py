@@ -0,0 +1,92 @@
+import logbook
+import pytest
+
+from pinking.generator import PWM, Generator, SquareWave, parse_waveform
+
+
+class FakeClock(object):
+    def __init__(self, lag=0.0):
+        self.now = 0.0
+        self.lag = lag
+
+    def timer(self):
+        return self.now
+
+    def sleep(self, seconds):
+        # oversleep a little, like a real scheduler would
+        self.now += seconds + self.lag
+
+
+@pytest.fixture
+def clock():
+    return FakeClock(lag=0.00002)
+
+
+def test_same_tick_pins_share_one_write(model, gpio, clock):
+    gen = Generator(model, resolution=0.001, timer=clock.timer,
+                    sleep=clock.sleep)
+    gen.add(11, SquareWave(10))
+    gen.add(15, SquareWave(10))
+
+    calls = gpio.output_calls
+    gen.run(0.05)
+
+    # both pins toggle on the same ticks: 0, 5, 10, ..., 50 ms
+    assert gpio.output_calls - calls == 11
+    assert gen.write_count == 11
+
+
+def test_timing_error_stats(model, clock):
+    gen = Generator(model, resolution=0.001, timer=clock.timer,
+                    sleep=clock.sleep)
+    gen.add(11, PWM(4, 0.25))
+    gen.run(0.02)
+
+    assert gen.write_count > 0
+    assert gen.error_max == pytest.approx(0.00002)
+    assert 0 < gen.mean_error <= gen.error_max
+
+
+def test_timing_error_reported_on_interrupt(model, clock):
+    def sleep(seconds):
+        if clock.now > 0.01:
+            raise KeyboardInterrupt
+        clock.sleep(seconds)
+
+    gen = Generator(model, resolution=0.001, timer=clock.timer, sleep=sleep)
+    gen.add(11, SquareWave(2))
+
+    with logbook.TestHandler() as handler:
+        with pytest.raises(KeyboardInterrupt):
+            gen.run()
+
+    assert gen.write_count > 0
+    assert any('timing error' in msg for msg in handler.formatted_records)
+
+
+def test_output_values(model, gpio, clock):
+    gen = Generator(model, resolution=0.001, timer=clock.timer,
+                    sleep=clock.sleep)
+    gen.add(11, PWM(4, 0.25))
+    gen.run(0.0005)
+
+    assert gpio.out_values[11] == 1
+
+
+@pytest.mark.parametrize('duty', [-1, 2])
+def test_pwm_duty_range(duty):
+    with pytest.raises(ValueError):
+        PWM(10, duty)
+
+
+@pytest.mark.parametrize('spec', ['pwm:12:100:2', 'pwm:12:100:-1',
+                                  'square:0:50', 'pattern:12:102:10'])
+def test_parse_invalid_waveform(model, spec):
+    with pytest.raises(ValueError):
+        parse_waveform(spec, Generator(model))
+
+
+def test_add_pin_out_of_range(model):
+    gen = Generator(model)
+    with pytest.raises(ValueError):
+        gen.add(*parse_waveform('square:99:50', gen))
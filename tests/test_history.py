@@ -0,0 +1,28 @@
+from pinking.history import PinHistory
+
+
+def test_sample_shifts():
+    history = PinHistory(2, width=8)
+    for state in (0b01, 0b11, 0b00, 0b01):
+        history.sample(state)
+
+    assert history.bits == [0b1101, 0b0100]
+    assert history.sparkline(0) == '____--_-'
+
+
+def test_sample_count_fills_missed_samples():
+    history = PinHistory(1, width=8)
+    history.sample(1)
+    history.sample(0, 3)
+    history.sample(1, 100)
+
+    assert history.bits == [0xff]
+
+
+def test_sparkline_width():
+    history = PinHistory(1, width=20)
+    history.sample(1)
+
+    assert history.sparkline(0, 5) == '____-'
+    assert len(history.sparkline(0)) == 20
+    assert history.sparkline(0, 0) == ''
@@ -0,0 +1,70 @@
+import errno
+import io
+import json
+
+from pinking.capture import read_capture
+from pinking.output import BinaryFormat, BufferedRecordWriter, JSONLFormat
+
+
+class BrokenPipe(io.BytesIO):
+    def write(self, data):
+        if data and self.tell():
+            raise IOError(errno.EPIPE, 'Broken pipe')
+        return super(BrokenPipe, self).write(data)
+
+
+def test_binary_roundtrip(model):
+    fp = io.BytesIO()
+    writer = BufferedRecordWriter(fp, BinaryFormat(model.layout), 0.01)
+    writer.write(1.5, 0b101)
+    writer.write(2.5, 0)
+    writer.close()
+
+    assert writer.error is None
+    assert writer.record_count == 2
+    assert list(read_capture(io.BytesIO(fp.getvalue()))) == [(1.5, 5),
+                                                             (2.5, 0)]
+
+
+def test_write_error_is_recorded(model):
+    fp = BrokenPipe()
+    fp.write(b'x')
+
+    writer = BufferedRecordWriter(fp, JSONLFormat(model.layout), 0.01)
+    writer.write(1.0, 1)
+    writer.close()
+
+    assert isinstance(writer.error, IOError)
+    assert writer.record_count == 0
+    assert not writer.pending
+
+
+def test_non_io_error_is_recorded(model):
+    fp = io.BytesIO()
+    writer = BufferedRecordWriter(fp, JSONLFormat(model.layout), 0.01)
+    fp.close()
+    writer.write(1.0, 1)
+    writer.close()
+
+    assert isinstance(writer.error, ValueError)
+    assert not writer.pending
+
+
+def test_header_error_is_recorded(model):
+    fp = io.BytesIO()
+    fp.close()
+
+    writer = BufferedRecordWriter(fp, BinaryFormat(model.layout), 0.01)
+    writer.close()
+
+    assert isinstance(writer.error, ValueError)
+    assert writer.record_count == 0
+
+
+def test_jsonl_first_record_has_no_changes(model):
+    fmt = JSONLFormat(model.layout)
+    lines = fmt.format([(1.0, 0b101), (2.0, 0b100)]).decode('ascii')
+
+    first, second = [json.loads(line) for line in lines.splitlines()]
+    assert first['changed'] == []
+    assert second['changed'] == [1]
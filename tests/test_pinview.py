@@ -0,0 +1,52 @@
+from pinking.dispatch import Dispatcher
+from pinking.pinview import PinView
+
+
+def test_name_filter(model):
+    view = PinView(model, 5)
+
+    view.set_filter('gpio2')
+    assert [model.layout[2 * row] for row in view.visible()][:2] == \
+        ['GPIO27', 'GPIO22']
+
+    view.set_filter('gnd')
+    assert all('GND' in model.layout[2 * row:2 * row + 2]
+               for row in view.rows)
+
+
+def test_scroll_is_bounded(model):
+    view = PinView(model, 5)
+
+    view.scroll(100)
+    assert view.visible() == list(range(15, 20))
+    view.scroll(-100)
+    assert view.visible() == list(range(5))
+
+
+def test_state_filter_through_dispatcher(model, gpio):
+    dispatcher = Dispatcher()
+    view = PinView(model, 5, dispatcher)
+    view.set_filter(':high')
+    assert view.rows == []
+
+    gpio.in_values[2] = 1
+    model.read_input_values()
+    dispatcher.close()
+
+    assert view.visible() == [1]
+    assert any(stats['enqueued'] for stats in dispatcher.stats()
+               if stats['name'] == 'PinView')
+
+
+def test_cleared_filter_stays_cleared(model, gpio):
+    dispatcher = Dispatcher()
+    view = PinView(model, 5, dispatcher)
+    view.set_filter(':high')
+
+    gpio.in_values[2] = 1
+    model.read_input_values()
+    dispatcher.close()
+
+    # a state change still pending must not bring back the old filter
+    view.set_filter('')
+    assert view.visible() == list(range(5))
@@ -0,0 +1,103 @@
+import pytest
+
+from pinking.trigger import (EdgeTrigger, PatternTrigger, TriggerCapture,
+                             check_trigger_pins, parse_trigger)
+
+
+class RecordingWriter(object):
+    def __init__(self):
+        self.records = []
+        self.marks = 0
+        self.flushes = 0
+
+    def write(self, timestamp, state):
+        self.records.append((timestamp, state))
+
+    def mark(self):
+        self.marks += 1
+
+    def flush(self):
+        self.flushes += 1
+
+
+def run_capture(states, triggers, pre, post):
+    writer = RecordingWriter()
+    capture = TriggerCapture(triggers, writer, pre, post)
+    for n, state in enumerate(states):
+        capture.sample(n, state)
+    return capture, writer
+
+
+def test_parse_trigger():
+    rising = parse_trigger('rising:12')
+    assert isinstance(rising, EdgeTrigger)
+    assert (rising.rise_mask, rising.fall_mask) == (1 << 11, 0)
+
+    falling = parse_trigger('falling:12')
+    assert (falling.rise_mask, falling.fall_mask) == (0, 1 << 11)
+
+    edge = parse_trigger('edge:12,16')
+    assert edge.rise_mask == edge.fall_mask == 1 << 11 | 1 << 15
+
+    pattern = parse_trigger('12=1,16=0')
+    assert isinstance(pattern, PatternTrigger)
+    assert (pattern.mask, pattern.value) == (1 << 11 | 1 << 15, 1 << 11)
+
+
+@pytest.mark.parametrize('spec', ['rising:0', 'rising:x', 'sideways:12',
+                                  '12=2', '12', 'edge:'])
+def test_parse_trigger_errors(spec):
+    with pytest.raises(ValueError):
+        parse_trigger(spec)
+
+
+def test_pattern_fires_on_change_into_match():
+    trigger = PatternTrigger(0b11, 0b01)
+
+    assert trigger(0b00, 0b01)
+    assert trigger(0b11, 0b101)
+    assert not trigger(0b01, 0b01)
+    assert not trigger(0b101, 0b01)
+    assert not trigger(0b00, 0b11)
+
+
+def test_edge_directions():
+    rising = EdgeTrigger(0b10, falling=False)
+    falling = EdgeTrigger(0b10, rising=False)
+
+    assert rising(0b00, 0b10) and not rising(0b10, 0b00)
+    assert falling(0b10, 0b00) and not falling(0b00, 0b10)
+    assert not rising(0b00, 0b01) and not falling(0b01, 0b00)
+
+
+def test_trigger_in_open_window_extends_it():
+    states = [0, 1, 0, 1, 0, 0, 0, 0]
+    capture, writer = run_capture(states, [EdgeTrigger(1, falling=False)],
+                                  pre=1, post=2)
+
+    assert capture.trigger_count == 2
+    assert writer.marks == 1
+    assert [n for n, _ in writer.records] == [0, 1, 2, 3, 4, 5]
+    assert writer.flushes == 1
+
+
+def test_pre_trigger_ring_size():
+    states = [0] * 10 + [1]
+    capture, writer = run_capture(states, [EdgeTrigger(1)], pre=3, post=0)
+
+    assert [n for n, _ in writer.records] == [7, 8, 9, 10]
+
+
+def test_check_trigger_pins(model):
+    check_trigger_pins([parse_trigger('rising:12')], model)
+
+    with pytest.raises(ValueError):
+        check_trigger_pins([parse_trigger('rising:99')], model)
+
+    # 3V3 is never sampled
+    with pytest.raises(ValueError):
+        check_trigger_pins([parse_trigger('12=1,1=0')], model)
+
+    model.set_direction(11, model.gpio.OUT)
+    with pytest.raises(ValueError):
+        check_trigger_pins([parse_trigger('falling:12')], model)
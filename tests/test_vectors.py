@@ -0,0 +1,39 @@
+import io
+
+import pytest
+
+from pinking.vectors import VectorError, VectorFile, VectorRunner
+
+
+def parse(text):
+    return VectorFile.parse(io.StringIO(text))
+
+
+def test_parse():
+    vf = parse(u'outputs 11 12\n'
+               u'inputs 15 16  # comment\n'
+               u'settle 0\n'
+               u'01 1x\n')
+
+    assert vf.outputs == [10, 11]
+    assert vf.inputs == [14, 15]
+    assert vf.settle == 0
+    assert vf.vectors == [(4, [0, 1], 1, 1)]
+
+
+def test_overlapping_pins():
+    with pytest.raises(VectorError) as e:
+        parse(u'outputs 11 12\ninputs 12 15\n')
+    assert e.value.lineno == 2
+
+
+def test_run(model, gpio):
+    vf = parse(u'outputs 11 12\ninputs 15 16\n01 1x\n10 00\n')
+    gpio.in_values[14] = 1
+
+    runner = VectorRunner(model, vf, settle=0)
+
+    assert not runner.run()
+    assert runner.passed == 1
+    assert [f.lineno for f in runner.failures] == [4]
+    assert gpio.out_values[10:12] == [1, 0]
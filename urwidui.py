@@ -40,6 +40,7 @@ logbook.debug('initial log message')
 
 from pinking.model import PinKingModel, RESERVED_PINS
 from pinking.fakegpio import FakeGPIO
+from pinking.pinview import PinView
 
 gpio = FakeGPIO()
 
@@ -69,19 +70,18 @@ palette = [
 
 
 class PinDisplayWidget(urwid.Widget):
-    _sizing = frozenset(['fixed'])
-    pfmt = '[{:2}]'
+    _sizing = frozenset(['box'])
+    _selectable = True
+    pfmt = '[{:3}]'
 
     def __init__(self, model):
         super(PinDisplayWidget, self).__init__()
         self.model = model
+        self.view = PinView(model, 0)
         self.update_dimensions()
         self.active_pin = 30
 
     def update_dimensions(self):
-        length = len(self.model.layout)
-        self.layout_height = length / 2 + length % 2
-
         # width of the text of a label
         self.largest_label = max(len(l) for l in self.model.layout)
 
@@ -102,13 +102,28 @@ class PinDisplayWidget(urwid.Widget):
 
         )
 
-    def pack(self, size=None, focus=False):
-        return (self.layout_width, self.layout_height)
+    def keypress(self, size, key):
+        maxcol, maxrow = size
+        step = {'up': -1, 'down': 1,
+                'page up': -maxrow, 'page down': maxrow}.get(key)
+
+        if step is None:
+            return key
+
+        self.view.scroll(step)
+        self._invalidate()
+
+    def set_filter(self, edit, query):
+        self.view.set_filter(query)
+        self._invalidate()
 
     def render(self, size, focus=False):
+        maxcol, maxrow = size
+        self.view.resize(maxrow)
+
         canv = urwid.CompositeCanvas(urwid.SolidCanvas(' ',
                                                        self.layout_width,
-                                                       self.layout_height))
+                                                       maxrow))
 
         def draw_chars(chars, left, top, attr=None):
             cc = urwid.CompositeCanvas(urwid.TextCanvas([chars]))
@@ -118,51 +133,64 @@ class PinDisplayWidget(urwid.Widget):
 
             canv.overlay(cc, left, top)
 
-        for pin, name in enumerate(self.model.layout):
-            row = pin // 2
-            col = pin % 2
-
-            # direction
-            pdir = self.model.directions[pin]
-            value = None
-
-            gpio = self.model.gpio
-
-            if pdir == gpio.IN:
-                value = self.model.in_values[pin]
-            elif pdir == gpio.OUT:
-                value = self.model.out_values[pin]
-
-            # construct the attribute tag
-            pin_tag = 'pin_{}_{}'.format(
-                'in' if pdir == gpio.IN else 'out',
-                'low' if value == gpio.LOW else 'high',
-            ) if name not in RESERVED_PINS else 'pin_special'
-
-            label_tag = 'label_{}'.format(
-                'selected' if pin == self.active_pin else 'unselected',
-            ) if name not in RESERVED_PINS else 'label_special'
-
-            label = self.lfmt[col].format(name)
-            draw_chars(label,
-                       col * (2 * self.pin_width + self.pin_gap +
-                              self.label_width),
-                       row,
-                       label_tag)
-
-            draw_chars(self.pfmt.format(pin + 1),
-                       self.label_width + col * (self.pin_width +
-                                                 self.pin_gap),
-                       row,
-                       pin_tag)
-
+        layout = self.model.layout
+        gpio = self.model.gpio
+
+        # only rows currently scrolled into view are rendered
+        for line, row in enumerate(self.view.visible()):
+            for col in (0, 1):
+                pin = 2 * row + col
+                if pin >= len(layout):
+                    break
+
+                name = layout[pin]
+
+                # direction
+                pdir = self.model.directions[pin]
+                value = None
+
+                if pdir == gpio.IN:
+                    value = self.model.in_values[pin]
+                elif pdir == gpio.OUT:
+                    value = self.model.out_values[pin]
+
+                # construct the attribute tag
+                pin_tag = 'pin_{}_{}'.format(
+                    'in' if pdir == gpio.IN else 'out',
+                    'low' if value == gpio.LOW else 'high',
+                ) if name not in RESERVED_PINS else 'pin_special'
+
+                label_tag = 'label_{}'.format(
+                    'selected' if pin == self.active_pin else 'unselected',
+                ) if name not in RESERVED_PINS else 'label_special'
+
+                label = self.lfmt[col].format(name)
+                draw_chars(label,
+                           col * (2 * self.pin_width + self.pin_gap +
+                                  self.label_width),
+                           line,
+                           label_tag)
+
+                draw_chars(self.pfmt.format(pin + 1),
+                           self.label_width + col * (self.pin_width +
+                                                     self.pin_gap),
+                           line,
+                           pin_tag)
+
+        canv.pad_trim_left_right(0, maxcol - self.layout_width)
         return canv
 
 
-layout = urwid.ListBox(urwid.SimpleFocusListWalker([
-    urwid.Padding(PinDisplayWidget(model), width='clip', align='center'),
-    urwid.Text('log goes here'),
-]))
+pin_display = PinDisplayWidget(model)
+filter_edit = urwid.Edit('filter: ')
+urwid.connect_signal(filter_edit, 'change', pin_display.set_filter)
+
+layout = urwid.Pile([
+    urwid.Padding(pin_display, width=pin_display.layout_width,
+                  align='center'),
+    ('pack', filter_edit),
+    ('pack', urwid.Text('log goes here')),
+])
 
 mw = urwid.Frame(layout,
                  urwid.Text('pinking {}'.format(__version__),